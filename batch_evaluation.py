@@ -0,0 +1,109 @@
+"""Score many boards at once with NumPy.
+
+evaluate_batch takes an (N, rows, cols) array of 0/1/2 cells and returns the
+N scores AIPlayer.evaluate_board would give.  All windows of four are
+gathered through one precomputed index tensor, so piece counts for every
+window of every board come out of a single fancy-indexing pass.
+
+Run ``python batch_evaluation.py [N]`` to check it against the scalar
+evaluate_board and compare boards/sec.
+"""
+
+import sys
+import time
+from functools import lru_cache
+
+import numpy as np
+
+from bitboard import geometry
+from engine import AIPlayer, Connect4
+from evaluation import window_score
+
+# Boards per chunk, to bound the (chunk, windows, 4) temporary
+CHUNK = 4096
+
+
+@lru_cache(maxsize=None)
+def window_index(rows: int, cols: int) -> np.ndarray:
+    """(windows, 4) flat cell indices of every window, in evaluate_board order."""
+    cells = geometry(rows, cols).window_cells
+    index = np.array([[r * cols + c for r, c in window] for window in cells], dtype=np.intp)
+    index.flags.writeable = False
+    return index
+
+
+# _WINDOW_SCORES[own * 5 + opp] == window_score(own, opp)
+_WINDOW_SCORES = np.array([window_score(s // 5, s % 5) if s // 5 + s % 5 <= 4 else 0 for s in range(25)],
+                          dtype=np.int32)
+
+
+def evaluate_batch(boards: np.ndarray, player: int) -> np.ndarray:
+    """Return evaluate_board scores for ``player`` of N boards of shape (N, rows, cols).
+
+    A board holding four in a row for ``player`` scores 1000, one for the
+    opponent -1000, and a full board without a winner 0, as with a
+    Connect4 whose game ended on that position.
+    """
+    boards = np.asarray(boards, dtype=np.int8)
+    if boards.ndim == 2:
+        boards = boards[np.newaxis]
+    n, rows, cols = boards.shape
+    index = window_index(rows, cols)
+    flat = boards.reshape(n, rows * cols)
+    scores = np.empty(n, dtype=np.int32)
+
+    for start in range(0, n, CHUNK):
+        chunk = flat[start:start + CHUNK]
+        windows = chunk[:, index]  # (chunk, windows, 4)
+        own = (windows == player).sum(axis=2, dtype=np.int8)
+        opp = (windows == 3 - player).sum(axis=2, dtype=np.int8)
+
+        score = _WINDOW_SCORES[own * 5 + opp].sum(axis=1)
+        score += (boards[start:start + CHUNK, :, cols // 2] == player).sum(axis=1) * 3
+
+        won = (own == 4).any(axis=1)
+        lost = (opp == 4).any(axis=1)
+        full = (chunk != 0).all(axis=1)
+        score[full] = 0
+        score[lost] = -1000
+        score[won] = 1000
+        scores[start:start + CHUNK] = score
+    return scores
+
+
+def random_games(n: int, rows: int = 6, cols: int = 7, seed: int = 0):
+    """Return (boards, games): n positions from random play, as an int8
+    array and as the Connect4 objects that reached them."""
+    rng = np.random.default_rng(seed)
+    games = []
+    for _ in range(n):
+        game = Connect4(rows, cols)
+        for _ in range(rng.integers(0, rows * cols + 1)):
+            if game.game_over:
+                break
+            moves = game.get_valid_moves()
+            game.drop_piece(moves[rng.integers(len(moves))])
+        games.append(game)
+    boards = np.stack([game.board for game in games]).astype(np.int8)
+    return boards, games
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    boards, games = random_games(n)
+
+    for player in (1, 2):
+        ai = AIPlayer(player)
+        start = time.perf_counter()
+        expected = np.array([ai.evaluate_board(game) for game in games])
+        scalar_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        scores = evaluate_batch(boards, player)
+        batch_time = time.perf_counter() - start
+
+        mismatches = int((scores != expected).sum())
+        print(f"player {player}: {n} boards, {mismatches} mismatches")
+        print(f"  scalar evaluate_board: {n / scalar_time:12,.0f} boards/sec")
+        print(f"  evaluate_batch:        {n / batch_time:12,.0f} boards/sec "
+              f"({scalar_time / batch_time:.0f}x)")
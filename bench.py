@@ -0,0 +1,221 @@
+"""Benchmarks for the engine hot paths, with regression checks.
+
+Times drop_piece, check_win, get_valid_moves, evaluate_board and
+minimax_move at several depths on fixed position sets, and the time to
+import the engine in a fresh interpreter (``python -X importtime``, which
+also tells whether NumPy or Tkinter got loaded).  Prints the results as
+JSON (median and p95 time per operation, nodes/sec for the searches) and
+optionally compares them against a stored baseline:
+
+    python bench.py --save-baseline bench_baseline.json
+    python bench.py --baseline bench_baseline.json --threshold 0.25
+
+The comparison exits with status 1 if any median got slower than the
+baseline by more than the threshold.  Nothing here imports tkinter.
+
+    python bench.py --imports
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List
+
+from engine import AIPlayer, Connect4
+
+# Fixed openings for the searches; the micro benchmarks use seeded games
+OPENINGS = [[], [3], [3, 3, 2], [3, 2, 4, 3, 3, 3], [0, 6, 1, 5, 3, 3, 4, 2],
+            [3, 3, 3, 3, 2, 4, 2, 2, 4, 4], [2, 3, 4, 3, 3, 2, 1, 4, 4, 5, 5, 2]]
+
+
+def random_games(count: int, seed: int = 0) -> List[List[int]]:
+    """Move lists of complete random games."""
+    rng = random.Random(seed)
+    games = []
+    for _ in range(count):
+        game = Connect4()
+        while not game.game_over:
+            game.drop_piece(rng.choice(game.get_valid_moves()))
+        games.append(game.moves)
+    return games
+
+
+def positions_from(games: List[List[int]]) -> List[Connect4]:
+    """Every non-final position of the given games."""
+    positions = []
+    for moves in games:
+        game = Connect4()
+        for col in moves[:-1]:
+            game.drop_piece(col)
+            positions.append(game.copy())
+    return positions
+
+
+def summarize(samples: List[float], ops: int) -> Dict[str, float]:
+    """Median and p95 of per-operation time over samples of ``ops`` operations."""
+    per_op = sorted(sample / ops for sample in samples)
+    p95 = per_op[min(len(per_op) - 1, math.ceil(0.95 * len(per_op)) - 1)]
+    return {"median_us": round(per_op[len(per_op) // 2] * 1e6, 3), "p95_us": round(p95 * 1e6, 3),
+            "samples": len(samples), "ops_per_sample": ops}
+
+
+def time_samples(run: Callable[[], int], repeat: int) -> Dict[str, float]:
+    """Time ``run`` (which returns how many operations it did) ``repeat`` times."""
+    samples, ops = [], 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        ops = run()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples, ops)
+
+
+def bench_moves(games: List[List[int]], positions: List[Connect4], repeat: int) -> Dict[str, Dict]:
+    results = {}
+
+    def drop_pieces():
+        ops = 0
+        for moves in games:
+            game = Connect4()
+            for col in moves:
+                game.drop_piece(col)
+            ops += len(moves)
+        return ops
+    results["drop_piece"] = time_samples(drop_pieces, repeat)
+
+    def check_wins():
+        for game in positions:
+            game.check_win(*game.last_move)
+        return len(positions)
+    results["check_win"] = time_samples(check_wins, repeat)
+
+    def valid_moves():
+        for game in positions:
+            game.get_valid_moves()
+        return len(positions)
+    results["get_valid_moves"] = time_samples(valid_moves, repeat)
+
+    ai = AIPlayer(1)
+    sample = positions[::4]
+    for game in sample:
+        game.board  # build the NumPy views outside the timed loop
+
+    def evaluate():
+        for game in sample:
+            ai.evaluate_board(game)
+        return len(sample)
+    results["evaluate_board"] = time_samples(evaluate, max(1, repeat // 4))
+    return results
+
+
+def bench_search(depth: int, repeat: int) -> Dict:
+    """minimax_move from every opening with an empty table each time."""
+    samples, nodes = [], 0
+    for _ in range(repeat):
+        for moves in OPENINGS:
+            game = Connect4()
+            for col in moves:
+                game.drop_piece(col)
+            ai = AIPlayer(game.current_player, "hard", depth=depth)
+            start = time.perf_counter()
+            ai.minimax_move(game, game.get_valid_moves(), depth)
+            samples.append(time.perf_counter() - start)
+            nodes += ai.nodes_visited
+    result = summarize(samples, 1)
+    result["nodes"] = nodes // repeat
+    result["nodes_per_sec"] = round(nodes / sum(samples))
+    return result
+
+
+def bench_import(module: str, repeat: int) -> Dict:
+    """Cumulative import time of ``module`` in a fresh interpreter, from
+    ``python -X importtime``, and which heavy modules the import loaded."""
+    code = f"import {module}, sys; print(','.join(m for m in ('numpy', 'tkinter') if m in sys.modules))"
+    here = os.path.dirname(os.path.abspath(__file__))
+    # One run that may write bytecode first, so compiling is not timed
+    env = {name: value for name, value in os.environ.items() if name != "PYTHONDONTWRITEBYTECODE"}
+    subprocess.run([sys.executable, "-c", f"import {module}"], cwd=here, env=env, check=True)
+    samples = []
+    for _ in range(repeat):
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=here,
+                                capture_output=True, text=True, check=True)
+        for line in result.stderr.splitlines():
+            fields = [field.strip() for field in line.split("|")]
+            if len(fields) == 3 and fields[2] == module:
+                samples.append(int(fields[1]) / 1e6)
+    summary = summarize(samples, 1)
+    summary["loads"] = [name for name in result.stdout.strip().split(",") if name]
+    return summary
+
+
+def run(depths: List[int], repeat: int, seed: int = 0) -> Dict:
+    games = random_games(50, seed)
+    positions = positions_from(games)
+    results = bench_moves(games, positions, repeat)
+    for depth in depths:
+        results[f"minimax_move/depth{depth}"] = bench_search(depth, max(1, repeat // 10))
+    results["import/engine"] = bench_import("engine", repeat)
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "tkinter_loaded": "tkinter" in sys.modules,
+        "results": results,
+    }
+
+
+def compare(current: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Lines describing every benchmark slower than the baseline by more
+    than ``threshold`` (0.25 = 25%)."""
+    regressions = []
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        ratio = result["median_us"] / base["median_us"] if base["median_us"] else 1.0
+        if ratio > 1 + threshold:
+            regressions.append(f"{name}: median {result['median_us']:.3f} us vs baseline "
+                               f"{base['median_us']:.3f} us ({ratio - 1:+.0%})")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the engine and check for regressions.")
+    parser.add_argument("--depths", type=int, nargs="+", default=[2, 4, 6])
+    parser.add_argument("--repeat", type=int, default=20, help="samples per micro benchmark")
+    parser.add_argument("-o", "--output", help="also write the results to this file")
+    parser.add_argument("--baseline", help="compare against this results file")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown, 0.25 = 25%%")
+    parser.add_argument("--save-baseline", metavar="FILE", help="write the results as the new baseline")
+    parser.add_argument("--imports", nargs="*", metavar="MODULE",
+                        help="only time importing these modules (default: engine)")
+    args = parser.parse_args(argv)
+
+    if args.imports is not None:
+        results = {f"import/{module}": bench_import(module, args.repeat) for module in args.imports or ["engine"]}
+        print(json.dumps(results, indent=2))
+        return
+    report = run(args.depths, args.repeat)
+    text = json.dumps(report, indent=2)
+    print(text)
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, "w") as f:
+            f.write(text + "\n")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print(f"no regressions beyond {args.threshold:.0%} against {args.baseline}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+"""Bitboard position used by the Connect 4 search.
+
+Every column takes ``rows + 1`` bits, bit 0 of a column being its bottom
+cell.  The extra bit on top of each column is always empty, so shifting a
+line sideways never wraps it into the neighbouring column.  A position is
+two integer masks (one per player) plus the next free bit of every column,
+which makes ``play``/``undo`` a handful of integer operations.
+
+Nothing here assumes the standard 7 x 6 board; each size gets its own
+Geometry, built on first use.  Run ``python bitboard.py [depth]`` to
+benchmark play/undo and the search on the 7 x 6, 8 x 7, 9 x 7 and 10 x 8
+boards.
+"""
+
+import random
+import sys
+import time
+from functools import lru_cache
+from typing import List, Tuple
+
+try:
+    popcount = int.bit_count
+except AttributeError:  # Python < 3.10
+    def popcount(x: int) -> int:
+        return bin(x).count("1")
+
+
+class Geometry:
+    """Board-size dependent masks and tables, built once per (rows, cols)."""
+
+    def __init__(self, rows: int, cols: int):
+        self.rows = rows
+        self.cols = cols
+        self.h1 = rows + 1
+        self.size = rows * cols
+        self.shifts = (1, self.h1 - 1, self.h1, self.h1 + 1)
+        # Source and destination shift of every column for mirror()
+        self.column_mask = (1 << self.h1) - 1
+        self.mirror_shifts = tuple((col * self.h1, (cols - 1 - col) * self.h1) for col in range(cols))
+
+        # Lowest bit of every column and the sentinel bit above it
+        self.bottom = [col * self.h1 for col in range(cols)]
+        self.top = [col * self.h1 + rows for col in range(cols)]
+        self.bottom_mask = sum(1 << b for b in self.bottom)
+
+        self.board_mask = 0
+        for col in range(cols):
+            self.board_mask |= ((1 << rows) - 1) << self.bottom[col]
+        self.center_mask = ((1 << rows) - 1) << self.bottom[cols // 2]
+        # Rows 1, 3, 5, ... counted from the bottom
+        self.odd_rows_mask = sum(1 << (bottom + r) for bottom in self.bottom for r in range(0, rows, 2))
+        # Preference of the medium AI for each column, rising towards the
+        # center: 1 2 3 4 3 2 1 on seven columns
+        self.column_weights = tuple((cols + 1) // 2 - abs(2 * col - (cols - 1)) // 2 for col in range(cols))
+
+        # Windows of four cells, in the same order AIPlayer.evaluate_board
+        # scans them: horizontal, vertical, and both diagonals
+        cells = []
+        for row in range(rows):
+            for col in range(cols - 3):
+                cells.append([(row, col + i) for i in range(4)])
+        for col in range(cols):
+            for row in range(rows - 3):
+                cells.append([(row + i, col) for i in range(4)])
+        for row in range(rows - 3):
+            for col in range(cols - 3):
+                cells.append([(row + i, col + i) for i in range(4)])
+        for row in range(rows - 3):
+            for col in range(3, cols):
+                cells.append([(row + i, col - i) for i in range(4)])
+        self.window_cells = tuple(tuple(w) for w in cells)
+        self.windows = tuple(sum(1 << self.bit(r, c) for r, c in w) for w in cells)
+
+        # Windows passing through each cell, keyed by bit index
+        self.cell_windows = {self.bit(r, c): [] for r in range(rows) for c in range(cols)}
+        for index, w in enumerate(cells):
+            for r, c in w:
+                self.cell_windows[self.bit(r, c)].append(index)
+        self.cell_windows = {b: tuple(ws) for b, ws in self.cell_windows.items()}
+
+    def mirror(self, bits: int) -> int:
+        """Reflect a bitboard (or position key) left to right."""
+        column_mask = self.column_mask
+        mirrored = 0
+        for source, dest in self.mirror_shifts:
+            mirrored |= ((bits >> source) & column_mask) << dest
+        return mirrored
+
+    def bit(self, row: int, col: int) -> int:
+        """Bit index of a cell given in board coordinates (row 0 is the top)."""
+        return col * self.h1 + (self.rows - 1 - row)
+
+    def cell(self, bit: int) -> Tuple[int, int]:
+        """Board coordinates of a bit index."""
+        col, r = divmod(bit, self.h1)
+        return self.rows - 1 - r, col
+
+
+@lru_cache(maxsize=None)
+def geometry(rows: int, cols: int) -> Geometry:
+    """Return the shared Geometry for a board size."""
+    return Geometry(rows, cols)
+
+
+def has_won(bb: int, h1: int) -> bool:
+    """Check whether a single player's mask contains four in a row."""
+    m = bb & (bb >> h1)  # horizontal
+    if m & (m >> (2 * h1)):
+        return True
+    m = bb & (bb >> (h1 - 1))  # diagonal /
+    if m & (m >> (2 * (h1 - 1))):
+        return True
+    m = bb & (bb >> (h1 + 1))  # diagonal \
+    if m & (m >> (2 * (h1 + 1))):
+        return True
+    m = bb & (bb >> 1)  # vertical
+    if m & (m >> 2):
+        return True
+    return False
+
+
+class Position:
+    """Connect 4 position as two bitboards with in-place play/undo."""
+
+    __slots__ = ("geometry", "rows", "cols", "boards", "heights", "to_move", "winner", "moves")
+
+    def __init__(self, rows: int = 6, cols: int = 7):
+        self.geometry = geometry(rows, cols)
+        self.rows = rows
+        self.cols = cols
+        self.boards = [0, 0]  # player 1, player 2
+        self.heights = list(self.geometry.bottom)  # next free bit per column
+        self.to_move = 1
+        self.winner = None
+        self.moves = []
+
+    @classmethod
+    def from_array(cls, board, to_move: int = 1) -> "Position":
+        """Build a position from a rows x cols grid of 0/1/2 (row 0 is the top)."""
+        rows, cols = len(board), len(board[0])
+        position = cls(rows, cols)
+        geo = position.geometry
+        for col in range(cols):
+            for row in range(rows - 1, -1, -1):
+                player = int(board[row][col])
+                if player == 0:
+                    break
+                position.boards[player - 1] |= 1 << geo.bit(row, col)
+                position.heights[col] += 1
+                position.moves.append(col)
+        position.to_move = to_move
+        for player in (1, 2):
+            if has_won(position.boards[player - 1], geo.h1):
+                position.winner = player
+        return position
+
+    def __reduce__(self):
+        # Pickle as the move list rather than dragging the Geometry along
+        return _restore, (self.rows, self.cols, tuple(self.boards), self.to_move, tuple(self.moves))
+
+    def copy(self) -> "Position":
+        other = self.__class__.__new__(self.__class__)
+        other.geometry = self.geometry
+        other.rows = self.rows
+        other.cols = self.cols
+        other.boards = list(self.boards)
+        other.heights = list(self.heights)
+        other.to_move = self.to_move
+        other.winner = self.winner
+        other.moves = list(self.moves)
+        return other
+
+    @property
+    def mask(self) -> int:
+        """All occupied cells."""
+        return self.boards[0] | self.boards[1]
+
+    @property
+    def game_over(self) -> bool:
+        return self.winner is not None or len(self.moves) == self.geometry.size
+
+    def key(self) -> int:
+        """Unique integer key for the position.
+
+        ``mask + bottom_mask`` leaves a single bit just above the pieces of
+        every column, so OR-ing in player 1's pieces below it describes the
+        position exactly.
+        """
+        return self.boards[0] | ((self.boards[0] | self.boards[1]) + self.geometry.bottom_mask)
+
+    def canonical_key(self) -> Tuple[int, bool]:
+        """The smaller of key() and the mirrored position's key.
+
+        Also returns whether that is the mirror's key, in which case moves
+        stored under it are mirrored too (column ``cols - 1 - col``).
+        """
+        key = self.key()
+        mirrored = self.geometry.mirror(key)
+        if mirrored < key:
+            return mirrored, True
+        return key, False
+
+    def can_play(self, col: int) -> bool:
+        return 0 <= col < self.cols and self.heights[col] < self.geometry.top[col]
+
+    def valid_moves(self) -> List[int]:
+        top = self.geometry.top
+        return [col for col in range(self.cols) if self.heights[col] < top[col]]
+
+    def play(self, col: int) -> int:
+        """Drop a piece for the side to move and return the bit it landed on.
+
+        The column must be playable; use can_play to check first.
+        """
+        bit = self.heights[col]
+        self.heights[col] = bit + 1
+        player = self.to_move
+        bb = self.boards[player - 1] | (1 << bit)
+        self.boards[player - 1] = bb
+        self.moves.append(col)
+        if self.winner is None and has_won(bb, self.geometry.h1):
+            self.winner = player
+        self.to_move = 3 - player
+        return bit
+
+    def undo(self) -> int:
+        """Take back the last move and return its column."""
+        col = self.moves.pop()
+        bit = self.heights[col] - 1
+        self.heights[col] = bit
+        player = 1 if self.boards[0] >> bit & 1 else 2
+        self.boards[player - 1] ^= 1 << bit
+        self.to_move = player
+        if self.winner is not None and not has_won(self.boards[self.winner - 1], self.geometry.h1):
+            self.winner = None
+        return col
+
+    def cell(self, row: int, col: int) -> int:
+        """Return 0, 1 or 2 for the piece at a cell (row 0 is the top)."""
+        bit = self.geometry.bit(row, col)
+        if self.boards[0] >> bit & 1:
+            return 1
+        if self.boards[1] >> bit & 1:
+            return 2
+        return 0
+
+    def landing_row(self, col: int) -> int:
+        """Board row a piece dropped in ``col`` would land on."""
+        return self.rows - 1 - (self.heights[col] - self.geometry.bottom[col])
+
+
+def _restore(rows: int, cols: int, boards: Tuple[int, int], to_move: int, moves: Tuple[int, ...]) -> Position:
+    position = Position(rows, cols)
+    position.boards = list(boards)
+    position.moves = list(moves)
+    for col in moves:
+        position.heights[col] += 1
+    position.to_move = to_move
+    for player in (1, 2):
+        if has_won(position.boards[player - 1], position.geometry.h1):
+            position.winner = player
+    return position
+
+
+if __name__ == "__main__":
+    from engine import AIPlayer, Connect4
+
+    depth = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    rng = random.Random(0)
+    for rows, cols in ((6, 7), (7, 8), (7, 9), (8, 10)):
+        start = time.perf_counter()
+        geo = Geometry(rows, cols)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        # Random games played forwards and unwound again
+        start = time.perf_counter()
+        plies = 0
+        for _ in range(200):
+            position = Position(rows, cols)
+            while not position.game_over:
+                position.play(rng.choice(position.valid_moves()))
+            plies += len(position.moves)
+            while position.moves:
+                position.undo()
+        playout_rate = plies / (time.perf_counter() - start)
+
+        # Fixed-depth search from a few short openings
+        nodes = elapsed = 0
+        for _ in range(5):
+            game = Connect4(rows, cols)
+            for _ in range(rng.randint(0, 6)):
+                game.drop_piece(rng.choice(game.get_valid_moves()))
+            if game.game_over:
+                continue
+            stats = AIPlayer(game.current_player, "hard", depth=depth).search(game)
+            nodes += stats.nodes
+            elapsed += stats.elapsed
+
+        print(f"{cols:2d} x {rows}: {len(geo.windows):3d} windows, tables built in {build_ms:5.2f} ms, "
+              f"{playout_rate:9,.0f} play+undo/s, depth {depth} search {nodes / elapsed:8,.0f} nodes/s "
+              f"({nodes} nodes)")
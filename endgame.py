@@ -0,0 +1,357 @@
+"""Endgame table: exact results of late-game positions.
+
+Every position reachable from a set of seed positions with at most
+``max_empty`` empty cells is solved by exhaustive negamax and stored with
+its exact score in the solver's convention (positive: the side to move
+wins, the larger the sooner; 0: draw; negative: loss).  Enumerating every
+such position of a full-size board is out of reach even for a few empty
+cells, so the seeds are positions reached in games, random or read from a
+game record file, and the table holds their complete subtrees.
+
+The file is one packed binary:
+
+    header   magic "C4EG", version, rows, cols, key width, max empty,
+             entry count, fence stride
+    fences   every stride-th key, the index into the keys
+    keys     canonical position keys, sorted, 8-byte aligned
+    scores   one int8 per key, in key order
+
+Keys are Position.canonical_key(), so a position and its mirror image share
+an entry, stored little-endian in the key width: 8 bytes on boards whose
+keys fit in 64 bits, so the mapped keys can be read as a uint64 array, else
+the fewest bytes that hold them.  EndgameTable maps the file; the fence
+index is read on the first lookup, which then binary searches one block of
+keys in place, touching one page of a large table rather than one per step.
+
+    python endgame.py build --empty 12 --seeds 500 -o endgame.bin
+    python endgame.py check endgame.bin
+"""
+
+import argparse
+import bisect
+import mmap
+import os
+import random
+import struct
+import sys
+import time
+import warnings
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from bitboard import Position
+from opening_book import key_width
+from solver import Solver
+
+MAGIC = b"C4EG"
+VERSION = 1
+HEADER = struct.Struct("<4sHBBBBII")  # magic, version, rows, cols, key width, max empty, count, stride
+FENCE_STRIDE = 64
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "endgame.bin")
+
+
+def win_score(position: Position) -> int:
+    """Score of winning with the next stone, for the side to move."""
+    return (position.geometry.size + 1 - len(position.moves)) // 2
+
+
+class EndgameTable:
+    """Read-only, memory-mapped view of an endgame table file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            self._file.close()
+            raise ValueError(f"{path} is not an endgame table")
+        self._keys = None
+        try:
+            (magic, version, self.rows, self.cols, self.key_width, self.max_empty,
+             self.count, self.stride) = HEADER.unpack_from(self._map, 0)
+        except struct.error:  # shorter than a header
+            magic = version = None
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a version {VERSION} endgame table")
+        if self.stride < 1 or self.key_width < 1:
+            self.close()
+            raise ValueError(f"{path} has a corrupt endgame table header")
+        self._keys_offset = keys_offset(self.count, self.stride, self.key_width)
+        self._scores_offset = self._keys_offset + self.count * self.key_width
+        if len(self._map) < self._scores_offset + self.count:
+            self.close()
+            raise ValueError(f"{path} is a truncated endgame table")
+        self._fences = None
+        # Keys as a uint64 sequence over the mapping, for bisect in C
+        if self.key_width == 8 and sys.byteorder == "little":
+            self._keys = memoryview(self._map)[self._keys_offset:self._scores_offset].cast("Q")
+        self.probes = 0
+        self.hits = 0
+
+    def close(self):
+        if self._map is not None:
+            if self._keys is not None:
+                self._keys.release()
+                self._keys = None
+            self._map.close()
+            self._file.close()
+            self._map = None
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _load_fences(self) -> List[int]:
+        width = self.key_width
+        count = (self.count + self.stride - 1) // self.stride
+        data = self._map[HEADER.size:HEADER.size + count * width]
+        return [int.from_bytes(data[i:i + width], "little") for i in range(0, len(data), width)]
+
+    def _key_at(self, index: int) -> int:
+        offset = self._keys_offset + index * self.key_width
+        return int.from_bytes(self._map[offset:offset + self.key_width], "little")
+
+    def lookup(self, position: Position) -> Optional[int]:
+        """Exact score of a position for the side to move, or None if it is
+        not in the table."""
+        if (self._map is None or position.geometry.size - len(position.moves) > self.max_empty
+                or (position.rows, position.cols) != (self.rows, self.cols)):
+            return None
+        self.probes += 1
+        if self._fences is None:
+            self._fences = self._load_fences()
+        key, _ = position.canonical_key()
+        block = bisect.bisect_right(self._fences, key) - 1
+        if block < 0:
+            return None
+        lo = block * self.stride
+        hi = min(lo + self.stride, self.count)
+        if self._keys is not None:
+            lo = bisect.bisect_left(self._keys, key, lo, hi)
+            if lo < hi and self._keys[lo] == key:
+                self.hits += 1
+                return struct.unpack_from("<b", self._map, self._scores_offset + lo)[0]
+            return None
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key_at(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.count and self._key_at(lo) == key:
+            self.hits += 1
+            return struct.unpack_from("<b", self._map, self._scores_offset + lo)[0]
+        return None
+
+    def analyze(self, position: Position) -> Optional[Dict[int, int]]:
+        """Exact score of every legal move, from the mover's point of view,
+        like Solver.analyze; None unless every move is covered."""
+        if position.geometry.size - len(position.moves) > self.max_empty + 1:
+            return None
+        position = position.copy()
+        win = win_score(position)
+        scores = {}
+        for col in position.valid_moves():
+            position.play(col)
+            if position.winner is not None:
+                scores[col] = win
+            elif position.game_over:
+                scores[col] = 0
+            else:
+                score = self.lookup(position)
+                if score is None:
+                    return None
+                scores[col] = -score
+            position.undo()
+        return scores
+
+
+def table_key_width(rows: int, cols: int) -> int:
+    width = key_width(rows, cols)
+    return 8 if width <= 8 else width
+
+
+def keys_offset(count: int, stride: int, width: int) -> int:
+    """File offset of the keys: after the header and fences, 8-byte aligned."""
+    end = HEADER.size + (count + stride - 1) // stride * width
+    return (end + 7) & ~7
+
+
+def load_endgame(path: str = DEFAULT_PATH) -> Optional[EndgameTable]:
+    """Open a table if the file exists, else return None; a file in another
+    format or version (say, from an older release) is skipped with a warning,
+    as the AI plays without it."""
+    if not os.path.exists(path):
+        return None
+    try:
+        return EndgameTable(path)
+    except ValueError as e:
+        warnings.warn(f"{e}; playing without it")
+        return None
+
+
+def write_table(path: str, entries: Dict[int, int], max_empty: int, rows: int = 6, cols: int = 7,
+                stride: int = FENCE_STRIDE):
+    """Write key -> score entries as a table file."""
+    width = table_key_width(rows, cols)
+    keys = sorted(entries)
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, rows, cols, width, max_empty, len(keys), stride))
+        f.write(b"".join(key.to_bytes(width, "little") for key in keys[::stride]))
+        f.write(bytes(keys_offset(len(keys), stride, width) - f.tell()))
+        f.write(b"".join(key.to_bytes(width, "little") for key in keys))
+        f.write(struct.pack(f"<{len(keys)}b", *(entries[key] for key in keys)))
+
+
+def solve_subtree(position: Position, entries: Dict[int, int]) -> int:
+    """Exact score of a non-terminal position by exhaustive negamax, adding
+    it and every non-terminal position below it to ``entries``."""
+    key, _ = position.canonical_key()
+    score = entries.get(key)
+    if score is not None:
+        return score
+    win = win_score(position)
+    best = -position.geometry.size
+    for col in position.valid_moves():
+        position.play(col)
+        if position.winner is not None:
+            score = win
+        elif position.game_over:
+            score = 0
+        else:
+            score = -solve_subtree(position, entries)
+        position.undo()
+        if score > best:
+            best = score
+    entries[key] = best
+    return best
+
+
+def random_seeds(count: int, max_empty: int, rows: int = 6, cols: int = 7,
+                 seed: int = 0) -> Iterator[Position]:
+    """Positions with ``max_empty`` empty cells reached by random games."""
+    rng = random.Random(seed)
+    produced = 0
+    while produced < count:
+        position = Position(rows, cols)
+        while not position.game_over and position.geometry.size - len(position.moves) > max_empty:
+            position.play(rng.choice(position.valid_moves()))
+        if not position.game_over:
+            produced += 1
+            yield position
+
+
+def record_seeds(path: str, max_empty: int) -> Iterator[Position]:
+    """The position with ``max_empty`` empty cells of every game in a
+    record file (see records.py) that got that far."""
+    from records import read_records
+
+    for record in read_records(path):
+        position = Position(record.rows, record.cols)
+        for col in record.moves[:position.geometry.size - max_empty]:
+            position.play(col)
+        if not position.game_over and position.geometry.size - len(position.moves) == max_empty:
+            yield position
+
+
+def build(seeds: Iterable[Position], max_empty: int) -> Dict[int, int]:
+    """Solve the subtrees of the seeds; all must have the same board size."""
+    entries = {}
+    for position in seeds:
+        if position.geometry.size - len(position.moves) > max_empty:
+            raise ValueError(f"seed {position.moves} has more than {max_empty} empty cells")
+        if not position.game_over:
+            solve_subtree(position.copy(), entries)
+    return entries
+
+
+def _negamax(position: Position) -> int:
+    """Plain exhaustive negamax with no table, for checking."""
+    win = win_score(position)
+    best = -position.geometry.size
+    for col in position.valid_moves():
+        position.play(col)
+        if position.winner is not None:
+            score = win
+        elif position.game_over:
+            score = 0
+        else:
+            score = -_negamax(position)
+        position.undo()
+        best = max(best, score)
+    return best
+
+
+def check(table: EndgameTable, seeds: Iterable[Position], samples: int = 200, seed: int = 0) -> int:
+    """Compare table scores, and the move scores analyze() derives from
+    them, with the solver and, for positions with up to 8 empty cells, with
+    a plain exhaustive negamax; returns how many positions were checked and
+    raises AssertionError on a mismatch."""
+    rng = random.Random(seed)
+    solver = Solver()
+    checked = 0
+    for position in seeds:
+        if checked >= samples:
+            break
+        # A random position in the seed's subtree
+        for _ in range(rng.randint(0, table.max_empty - 1)):
+            moves = position.valid_moves()
+            position.play(rng.choice(moves))
+            if position.game_over:
+                position.undo()
+                break
+        score = table.lookup(position)
+        assert score is not None, f"{position.moves} missing from the table"
+        assert score == solver.solve(position), f"{position.moves}: table {score}, solver {solver.solve(position)}"
+        assert table.analyze(position) == solver.analyze(position), f"{position.moves}: move scores differ"
+        if position.geometry.size - len(position.moves) <= 8:
+            assert score == _negamax(position), f"{position.moves}: table {score}, negamax {_negamax(position)}"
+        checked += 1
+    return checked
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build and check an endgame table.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    gen = commands.add_parser("build", help="solve the subtrees of seed positions")
+    gen.add_argument("--empty", type=int, default=12, help="empty cells left in the seed positions")
+    gen.add_argument("--seeds", type=int, default=500, help="random seed positions")
+    gen.add_argument("--records", help="take the seeds from this game record file instead")
+    gen.add_argument("--rows", type=int, default=6)
+    gen.add_argument("--cols", type=int, default=7)
+    gen.add_argument("--seed", type=int, default=0)
+    gen.add_argument("-o", "--output", default=DEFAULT_PATH)
+
+    test = commands.add_parser("check", help="compare a table with exhaustive search")
+    test.add_argument("table", nargs="?", default=DEFAULT_PATH)
+    test.add_argument("--samples", type=int, default=200)
+    test.add_argument("--seeds", type=int, default=500, help="the --seeds the table was built with")
+    test.add_argument("--seed", type=int, default=0, help="the --seed the table was built with")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        if args.records:
+            seeds = record_seeds(args.records, args.empty)
+        else:
+            seeds = random_seeds(args.seeds, args.empty, args.rows, args.cols, args.seed)
+        start = time.perf_counter()
+        entries = build(seeds, args.empty)
+        elapsed = time.perf_counter() - start
+        write_table(args.output, entries, args.empty, args.rows, args.cols)
+        size = os.path.getsize(args.output)
+        print(f"{len(entries)} positions with up to {args.empty} empty cells in {elapsed:.1f}s "
+              f"({len(entries) / elapsed:,.0f}/s), {size} bytes ({size / max(1, len(entries)):.1f} per position) "
+              f"-> {args.output}", file=sys.stderr)
+    else:
+        table = EndgameTable(args.table)
+        start = time.perf_counter()
+        checked = check(table, random_seeds(args.seeds, table.max_empty, table.rows, table.cols, args.seed),
+                        args.samples)
+        print(f"{checked} positions match the solver and exhaustive negamax "
+              f"({time.perf_counter() - start:.1f}s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,761 @@
+import random
+import threading
+import time
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
+
+from bitboard import Position
+from endgame import EndgameTable
+from evaluation import EvalPosition
+from mcts import MCTS
+from opening_book import OpeningBook
+from ordering import MoveOrdering, center_order
+from search_stats import SearchStats
+from solver import Solver, SolverTimeout, describe
+from threats import OPEN, WIN, LOSS, Threats, classify, cells_to_moves
+from transposition import TranspositionTable, EXACT, LOWER, UPPER
+
+if TYPE_CHECKING:
+    import numpy as np
+    from learned_eval import LearnedEvaluator
+
+class Connect4:
+    def __init__(self, rows=6, cols=7): #init is a contructor .. ya3ni bybtdy m3 el code 
+        self.rows = rows
+        self.cols = cols
+        self.position = Position(rows, cols)
+        self._board = None
+        self.game_over = False
+        self.winner = None
+        self.last_move = None
+        self.redo_moves = []  # columns taken back by undo, next one last
+
+    def reset(self): # function rest NPM model that works to find relationships
+        self.position = Position(self.rows, self.cols)
+        self._board = None
+        self.game_over = False
+        self.winner = None
+        self.last_move = None
+        self.redo_moves = []
+
+    def copy(self) -> "Connect4":
+        """Independent snapshot of the game, e.g. for a search thread."""
+        other = Connect4(self.rows, self.cols)
+        other.position = self.position.copy()
+        other.game_over = self.game_over
+        other.winner = self.winner
+        other.last_move = self.last_move
+        other.redo_moves = list(self.redo_moves)
+        return other
+
+    @property
+    def moves(self) -> List[int]:
+        """Columns played so far, in order."""
+        return list(self.position.moves)
+
+    @property
+    def board(self) -> "np.ndarray":
+        """Read-only NumPy view of the position, rebuilt only after a move.
+
+        NumPy is imported here, on first use, so the engine loads without it."""
+        if self._board is None:
+            import numpy as np
+
+            board = np.zeros((self.rows, self.cols), dtype=int)
+            for player in (1, 2):
+                bb = self.position.boards[player - 1]
+                while bb:
+                    low = bb & -bb
+                    board[self.position.geometry.cell(low.bit_length() - 1)] = player
+                    bb ^= low
+            board.flags.writeable = False
+            self._board = board
+        return self._board
+
+    @board.setter
+    def board(self, board):
+        self.position = Position.from_array(board, self.current_player)
+        self._board = None
+
+    @property
+    def current_player(self) -> int:
+        return self.position.to_move
+
+    @current_player.setter
+    def current_player(self, player: int):
+        self.position.to_move = player
+
+    def drop_piece(self, col: int) -> bool:
+        """Attempt to drop a piece in the specified column.
+        Returns True if successful, False if column is full."""
+        if not self.position.can_play(col):
+            return False
+        self.redo_moves = []
+        self._play(col)
+        return True
+
+    def undo(self) -> Optional[int]:
+        """Take back the last move; returns its column, or None at the start."""
+        if not self.position.moves:
+            return None
+        col = self.position.undo()
+        self.redo_moves.append(col)
+        self._board = None
+        self.winner = self.position.winner
+        self.game_over = self.position.game_over
+        if self.position.moves:
+            last = self.position.moves[-1]
+            self.last_move = (self.position.landing_row(last) + 1, last)
+        else:
+            self.last_move = None
+        return col
+
+    def redo(self) -> Optional[int]:
+        """Replay the last move taken back; returns its column, or None."""
+        if not self.redo_moves:
+            return None
+        col = self.redo_moves.pop()
+        self._play(col)
+        return col
+
+    def _play(self, col: int):
+        row = self.position.landing_row(col)
+        self.position.play(col)
+        self._board = None
+        self.last_move = (row, col)
+
+        if self.position.winner is not None:
+            self.game_over = True
+            self.winner = self.position.winner
+        elif self.position.game_over:
+            self.game_over = True
+
+    def check_win(self, row: int, col: int) -> bool:
+        """Check if the piece at (row, col) is part of four in a row."""
+        player = self.position.cell(row, col)
+        if player == 0:
+            return False
+        geo = self.position.geometry
+        bb = self.position.boards[player - 1]
+        return any(bb & geo.windows[w] == geo.windows[w] for w in geo.cell_windows[geo.bit(row, col)])
+
+    def get_valid_moves(self) -> List[int]:
+        """Returns a list of valid column indices where a piece can be dropped."""
+        return self.position.valid_moves()
+
+    def is_valid_move(self, col: int) -> bool:
+        """Check if a move is valid."""
+        return self.position.can_play(col)
+
+    def print_board(self):
+        """Print the board to the terminal."""
+        print("\n" + "-" * (self.cols * 4 + 1))
+        for row in self.board:
+            print("|", end="")
+            for cell in row:
+                print(f" {' ' if cell == 0 else 'X' if cell == 1 else 'O'} |", end="")
+            print("\n" + "-" * (self.cols * 4 + 1))
+        print(f"Current Player: {self.current_player} ({'X' if self.current_player == 1 else 'O'})")
+        if self.last_move:
+            print(f"Last move: row {self.last_move[0]}, col {self.last_move[1]}")
+
+
+class SearchTimeout(Exception):
+    """Raised inside minimax when the current move's time budget runs out
+    or the search is cancelled."""
+
+
+class AIPlayer:
+    def __init__(self, player_num: int, difficulty: str = "medium", tt_size: int = 1 << 18,
+                 workers: int = 1, split_ply: int = 1, depth: int = 4,
+                 ordering: Optional[Dict[str, bool]] = None, book: Optional[OpeningBook] = None,
+                 hooks: Optional[List[Callable[[SearchStats], None]]] = None, symmetry: bool = True,
+                 playouts: int = 2000, exploration: float = 1.4, threat_pruning: bool = True,
+                 endgame: Optional[EndgameTable] = None, evaluator: Optional["LearnedEvaluator"] = None):
+        self.player_num = player_num
+        self.difficulty = difficulty
+        self.depth = depth  # hard AI search depth when no time budget is given
+        self.nodes_visited = 0
+        # Kept for the whole game so later moves reuse earlier searches
+        self.tt = TranspositionTable(tt_size)
+        self.depth_reached = 0
+        self.last_score = None  # root score of the last search
+        self._deadline = None
+        # Set from another thread (see cancel) to abort the current search
+        self.stop_event = threading.Event()
+        # Position key -> (best move, depth, seconds spent) filled in by ponder()
+        self.ponder_moves = {}
+        # Depth the last budgeted search reached before its time ran out
+        self.budget_depth = None
+        # With more than one worker, minimax_move searches root subtrees in
+        # a process pool (see parallel_search.py), created on first use
+        self.workers = workers
+        self.split_ply = split_ply
+        self.parallel = None
+        # Skip moves that let the opponent win at once (see threats.py)
+        self.threat_pruning = threat_pruning
+        # Share transposition table entries between mirrored positions
+        self.symmetry = symmetry
+        # Switches for the center/tt/killers/history move ordering heuristics
+        self.ordering = MoveOrdering(**(ordering or {}))
+        # Opening book consulted by the hard AI before it searches
+        self.book = OpeningBook(book) if isinstance(book, str) else book
+        # Exact endgame results, probed at the root by the hard and perfect
+        # AIs and at every node of the hard AI's search
+        self.endgame = EndgameTable(endgame) if isinstance(endgame, str) else endgame
+        # Learned evaluation (see learned_eval.py) used by the hard AI's
+        # search instead of the window heuristic; it needs NumPy, so a path
+        # is only loaded here
+        if isinstance(evaluator, str):
+            from learned_eval import LearnedEvaluator
+            evaluator = LearnedEvaluator.load(evaluator)
+        self.evaluator = evaluator
+        # Exact solver for the "perfect" difficulty, created on first use
+        self.solver = None
+        self.last_outcome = None
+        # UCT tree for the "mcts" difficulty, kept between moves; playouts
+        # per move when no time budget is given
+        self.mcts = None
+        self.playouts = playouts
+        self.exploration = exploration
+        # Called with the SearchStats of every move (see search_stats.py)
+        self.hooks = list(hooks or [])
+        self.last_stats = None
+        # Filled in while a move is searched, copied into its SearchStats
+        self.source = None
+        self.root_times = {}
+        self.last_root_scores = {}
+        
+    def get_move(self, game: Connect4, time_budget_ms: Optional[int] = None) -> int:
+        """Get the AI's move based on the current game state.
+
+        With a time budget the hard AI deepens its search until the budget
+        runs out instead of stopping at a fixed depth."""
+        return self.search(game, time_budget_ms).move
+    
+    def search(self, game: Connect4, time_budget_ms: Optional[int] = None,
+               time_limit_ms: Optional[int] = None) -> SearchStats:
+        """Pick a move like get_move and return it with the search's stats.
+
+        Without a time budget, ``time_limit_ms`` caps the search: it keeps
+        its depth, playouts or exact solve, but returns its best move so far
+        once the limit runs out.  The stats are also kept in last_stats and
+        passed to every hook."""
+        valid_moves = game.get_valid_moves()
+        self.nodes_visited = 0
+        self.tt.reset_stats()
+        self.ordering.reset()
+        self.depth_reached = 0
+        self.root_times = {}
+        self.last_root_scores = {}
+        self.last_outcome = None
+        if self.parallel is not None:
+            self.parallel.stats = None
+        
+        start = time.perf_counter()
+        move = self.choose_move(game, valid_moves, time_budget_ms, time_limit_ms)
+        
+        stats = SearchStats(self.player_num, self.difficulty)
+        stats.elapsed = time.perf_counter() - start
+        stats.move = move
+        stats.source = self.source
+        if self.source in ("book", "ponder", "search", "solver", "endgame", "mcts"):
+            stats.score = self.last_score
+        stats.outcome = self.last_outcome
+        stats.depth = self.depth_reached
+        stats.nodes = self.nodes_visited
+        stats.cutoffs = self.ordering.cutoffs
+        stats.first_move_cutoffs = self.ordering.first_move_cutoffs
+        stats.tt_hits, stats.tt_misses, stats.tt_collisions = self.tt.hits, self.tt.misses, self.tt.collisions
+        stats.root_scores = self.last_root_scores
+        stats.root_times = self.root_times
+        if self.parallel is not None:
+            stats.parallel = self.parallel.stats
+        if self.source == "mcts":
+            stats.playouts = self.mcts.playouts
+            stats.reused_playouts = self.mcts.reused_playouts
+        
+        self.last_stats = stats
+        for hook in self.hooks:
+            hook(stats)
+        return stats
+    
+    def choose_move(self, game: Connect4, valid_moves: List[int], time_budget_ms: Optional[int] = None,
+                    time_limit_ms: Optional[int] = None) -> int:
+        if self.difficulty == "easy":
+            self.source = "random"
+            return random.choice(valid_moves)
+        elif self.difficulty == "medium":
+            self.source = "heuristic"
+            return self.medium_ai_move(game, valid_moves)
+        elif self.difficulty == "perfect":
+            if self.endgame is not None:
+                move = self.endgame_move(game, valid_moves)
+                if move is not None:
+                    return move
+            return self.perfect_move(game, valid_moves, time_budget_ms if time_budget_ms is not None else time_limit_ms)
+        elif self.difficulty == "mcts":
+            self.source = "mcts"
+            return self.mcts_move(game, time_budget_ms, time_limit_ms)
+        else:  # hard
+            pondered = self.ponder_moves.pop(game.position.key(), None)
+            self.ponder_moves = {}
+            if pondered is not None and pondered[0] not in valid_moves:
+                pondered = None
+            if pondered is not None:
+                move, depth, spent = pondered
+                # With a time budget the pondered move is as good as a search
+                # once it is as deep as the last budgeted one got, or pondering
+                # already took the whole budget; otherwise the search goes on
+                # from it with the time left
+                if time_budget_ms is None:
+                    done = depth >= self.depth
+                else:
+                    done = (self.budget_depth is not None and depth >= self.budget_depth
+                            or spent * 1000 >= time_budget_ms)
+                if done:
+                    self.source = "ponder"
+                    self.depth_reached = depth
+                    return move
+                if time_budget_ms is not None:
+                    time_budget_ms = max(1, int(time_budget_ms - spent * 1000))
+                pondered = move, depth
+            if self.book is not None:
+                entry = self.book.lookup(game.position)
+                if entry is not None and entry[0] in valid_moves:
+                    self.source = "book"
+                    self.last_score = entry[1]
+                    return entry[0]
+            if self.endgame is not None:
+                move = self.endgame_move(game, valid_moves)
+                if move is not None:
+                    return move
+            self.source = "search"
+            if time_budget_ms is not None:
+                return self.iterative_deepening_move(game, valid_moves, time_budget_ms, pondered=pondered)
+            if time_limit_ms is not None:
+                return self.iterative_deepening_move(game, valid_moves, time_limit_ms, self.depth)
+            return self.minimax_move(game, valid_moves, self.depth)
+    
+    def cancel(self):
+        """Ask a search running in another thread to stop as soon as possible.
+
+        The search raises SearchTimeout (or returns its best move so far when
+        deepening); clear stop_event before starting the next one."""
+        self.stop_event.set()
+    
+    def medium_ai_move(self, game: Connect4, valid_moves: List[int]) -> int:
+        position = game.position
+        geo = position.geometry
+
+        # Win if possible; otherwise block the opponent's immediate win and
+        # stay off the cells just below their other threats
+        status, cells = classify(position)
+        if status == WIN:
+            return cells_to_moves(cells, geo)[0]
+        if status == LOSS:
+            # Lost anyway: still block one threat if there is one
+            cells = Threats(position).immediate[2 - position.to_move]
+        candidates = cells_to_moves(cells, geo) or valid_moves
+        
+        # Choose randomly among those but prefer center columns
+        weights = geo.column_weights
+        weighted_moves = []
+        for col in candidates:
+            weighted_moves.extend([col] * weights[col])
+        return random.choice(weighted_moves)
+    
+    def perfect_move(self, game: Connect4, valid_moves: List[int], time_budget_ms: Optional[int] = None) -> int:
+        """Play the move with the best exact score.
+
+        With a time budget, the solver gets half of it; if the position
+        cannot be solved in time the rest goes to the heuristic search."""
+        if self.solver is None:
+            self.solver = Solver(stop_event=self.stop_event)
+        position = game.position.copy()
+        start = time.perf_counter()
+        deadline = None if time_budget_ms is None else start + time_budget_ms / 2000
+        nodes_before = self.solver.nodes
+        
+        self.source = "solver"
+        try:
+            scores = self.solver.analyze(position, deadline)
+        except SolverTimeout:
+            self.nodes_visited += self.solver.nodes - nodes_before
+            if self.stop_event.is_set():
+                raise SearchTimeout()
+            remaining_ms = time_budget_ms - (time.perf_counter() - start) * 1000
+            self.source = "search"
+            self.last_outcome = None
+            return self.iterative_deepening_move(game, valid_moves, max(1, int(remaining_ms)))
+        self.nodes_visited += self.solver.nodes - nodes_before
+        
+        # Among equally good moves prefer the center
+        order = center_order(game.cols)
+        best_move = max(valid_moves, key=lambda col: (scores[col], -order.index(col)))
+        self.last_score = scores[best_move]
+        self.last_outcome = describe(self.last_score, len(position.moves), position.geometry.size)
+        self.last_root_scores = scores
+        return best_move
+    
+    def endgame_move(self, game: Connect4, valid_moves: List[int]) -> Optional[int]:
+        """Play the move with the best exact score from the endgame table,
+        or return None if the table does not cover every move."""
+        scores = self.endgame.analyze(game.position)
+        if scores is None:
+            return None
+        order = center_order(game.cols)
+        best_move = max(valid_moves, key=lambda col: (scores[col], -order.index(col)))
+        self.source = "endgame"
+        self.last_score = scores[best_move]
+        self.last_outcome = describe(self.last_score, len(game.position.moves), game.position.geometry.size)
+        self.last_root_scores = scores
+        return best_move
+    
+    def mcts_move(self, game: Connect4, time_budget_ms: Optional[int] = None,
+                  time_limit_ms: Optional[int] = None) -> int:
+        """Monte Carlo Tree Search for ``self.playouts`` playouts (or fewer
+        if the time limit runs out first), or for the time budget if one is
+        given, reusing the tree from the last move."""
+        if self.mcts is None:
+            self.mcts = MCTS(self.exploration, stop_event=self.stop_event)
+        deadline = None
+        playouts = self.playouts
+        if time_budget_ms is not None:
+            deadline = time.perf_counter() + time_budget_ms / 1000
+            playouts = None
+        elif time_limit_ms is not None:
+            deadline = time.perf_counter() + time_limit_ms / 1000
+        move = self.mcts.search(game.position, playouts, deadline)
+        if self.stop_event.is_set():
+            raise SearchTimeout()
+        self.nodes_visited += self.mcts.plies
+        self.depth_reached = self.mcts.max_depth
+        values = self.mcts.root_values()
+        self.last_root_scores = {col: round(rate, 4) for col, (_, rate) in values.items()}
+        self.last_score = self.last_root_scores[move]
+        return move
+    
+    def minimax_move(self, game: Connect4, valid_moves: List[int], depth: int = 4) -> int:
+        """Use minimax algorithm with alpha-beta pruning to determine best move."""  ## minmax with alphabeta
+        best_score = -float('inf')
+        best_move = random.choice(valid_moves)
+        
+        # Search on a private copy so the game shown by the GUI is never touched
+        position = EvalPosition.from_position(game.position)
+        if self.workers > 1:
+            if self.parallel is None:
+                from parallel_search import ParallelSearch
+                self.parallel = ParallelSearch(self.workers, self.split_ply)
+            scores = self.parallel.root_scores(self, position, valid_moves, depth)
+            self.nodes_visited += self.parallel.stats.nodes
+        else:
+            scores = self.root_scores(position, valid_moves, depth)
+        
+        for col in valid_moves:
+            score = scores[col]
+            if score > best_score:
+                best_score = score
+                best_move = col
+        
+        self.last_score = best_score
+        self.last_root_scores = scores
+        self.depth_reached = depth
+        return best_move
+    
+    def iterative_deepening_move(self, game: Connect4, valid_moves: List[int], time_budget_ms: int,
+                                 max_depth: Optional[int] = None,
+                                 pondered: Optional[Tuple[int, int]] = None) -> int:
+        """Search depth 1, 2, 3, ... and return the best move of the last
+        iteration that finished before the time budget ran out.
+
+        A (move, depth) found by ponder() is searched first and the
+        deepening goes on from the depth after it; the move is returned if
+        no deeper iteration finishes.  It returns at once with a single
+        legal move and stops deepening once the result is proven: a win or
+        loss at the root, or every move but one a loss."""
+        if len(valid_moves) == 1:
+            self.last_score = None
+            return valid_moves[0]
+        position = EvalPosition.from_position(game.position)
+        if max_depth is None:
+            max_depth = position.geometry.size - len(position.moves)
+        ordered_moves = list(valid_moves)
+        best_move, best_score = ordered_moves[0], None
+        self.depth_reached = 0
+        first_depth = 1
+        
+        # Depth 1 always runs to completion so there is a move to return,
+        # unless pondering already gave one
+        deadline = time.perf_counter() + time_budget_ms / 1000
+        if pondered is not None:
+            best_move, self.depth_reached = pondered
+            ordered_moves.remove(best_move)
+            ordered_moves.insert(0, best_move)
+            first_depth = self.depth_reached + 1
+            self._deadline = deadline
+            self.source = "ponder"
+        try:
+            for depth in range(first_depth, max_depth + 1):
+                scores = self.root_scores(position, ordered_moves, depth)
+                
+                # Best move of this iteration goes first in the next one
+                ordered_moves.sort(key=lambda col: scores[col], reverse=True)
+                best_move, best_score = ordered_moves[0], scores[ordered_moves[0]]
+                self.last_root_scores = scores
+                self.depth_reached = depth
+                self.source = "search"
+                self._deadline = deadline
+                if time.perf_counter() > deadline:
+                    self.budget_depth = depth
+                    break
+                if abs(best_score) >= 1000 or sum(score > -1000 for score in scores.values()) == 1:
+                    break
+        except SearchTimeout:
+            if not self.stop_event.is_set():
+                self.budget_depth = self.depth_reached
+        finally:
+            self._deadline = None
+        
+        self.last_score = best_score
+        return best_move
+    
+    def root_scores(self, position: EvalPosition, moves: List[int], depth: int) -> Dict[int, float]:
+        """Exact depth-limited score of each root move, searched in the given order.
+
+        Time spent in each subtree is added to root_times."""
+        scores = {}
+        for col in moves:
+            start = time.perf_counter()
+            position.play(col)
+            try:
+                scores[col] = self.minimax(position, depth-1, -float('inf'), float('inf'), False)
+            finally:
+                self.root_times[col] = self.root_times.get(col, 0.0) + time.perf_counter() - start
+            position.undo()
+        return scores
+    
+    def ponder(self, game: Connect4):
+        """Search our answers to every opponent reply until cancel() is called.
+        
+        Meant to run in a background thread while the opponent thinks. The
+        replies are deepened together, one depth at a time; results go into
+        the shared transposition table, and the best answer to each reply is
+        kept in ponder_moves for get_move with the time spent on the reply."""
+        self.ponder_moves = {}
+        if self.difficulty != "hard" or game.game_over:
+            return
+        position = EvalPosition.from_position(game.position)
+        replies = [col for col in center_order(game.cols) if position.can_play(col)]
+        max_depth = position.geometry.size - len(position.moves) - 1
+        self.nodes_visited = 0
+        self.ordering.reset()
+        spent = dict.fromkeys(replies, 0.0)
+        
+        try:
+            for depth in range(1, max_depth + 1):
+                for reply in replies:
+                    position.play(reply)
+                    if not position.game_over:
+                        start = time.perf_counter()
+                        try:
+                            scores = self.root_scores(position, position.valid_moves(), depth)
+                        finally:
+                            spent[reply] += time.perf_counter() - start
+                        best = max(scores, key=scores.get)
+                        self.ponder_moves[position.key()] = (best, depth, spent[reply])
+                    position.undo()
+                self.depth_reached = depth
+        except SearchTimeout:
+            pass
+    
+    def minimax(self, position: Position, depth: int, alpha: float, beta: float, maximizing_player: bool) -> float:
+        """Minimax algorithm with alpha-beta pruning, playing and undoing moves in place."""
+        self.nodes_visited += 1
+        if not self.nodes_visited & 1023 and ((self._deadline is not None and time.perf_counter() > self._deadline)
+                                              or self.stop_event.is_set()):
+            raise SearchTimeout()
+        
+        # Positions in the endgame table score exactly, leaves included
+        if self.endgame is not None and not position.game_over:
+            exact = self.endgame_value(position)
+            if exact is not None:
+                return exact
+        
+        if depth == 0 or position.game_over:
+            return self.evaluate_position(position)
+        
+        # Mirrored positions share an entry, keyed on the smaller key; the
+        # evaluation is only mirror-symmetric with a single center column
+        key = position.key()
+        mirrored = False
+        if self.symmetry and position.cols & 1:
+            mirror_key = position.geometry.mirror(key)
+            if mirror_key < key:
+                key, mirrored = mirror_key, True
+        tt_move = None
+        entry = self.tt.probe(key)
+        if entry is not None:
+            tt_value, tt_depth, bound, tt_move = entry
+            if mirrored and tt_move is not None:
+                tt_move = position.cols - 1 - tt_move
+            if tt_depth >= depth:
+                if bound == EXACT:
+                    return tt_value
+                elif bound == LOWER:
+                    alpha = max(alpha, tt_value)
+                else:
+                    beta = min(beta, tt_value)
+                if alpha >= beta:
+                    return tt_value
+        
+        decided, valid_moves = self.prune_moves(position, self.ordering.order(position, tt_move))
+        if decided is not None:
+            return decided
+        
+        alpha_orig, beta_orig = alpha, beta
+        best_move = None
+        
+        if depth == 1 and self.evaluator is not None and valid_moves:
+            # Score every child in one batch instead of visiting each; they
+            # count as visited, but are not probed in the endgame table
+            self.nodes_visited += len(valid_moves)
+            scores = self.evaluator.evaluate_children(position, valid_moves, self.player_num)
+            pick = max if maximizing_player else min
+            value, best_move = pick(zip(scores, valid_moves), key=lambda item: item[0])
+        elif maximizing_player:
+            value = -float('inf')
+            for index, col in enumerate(valid_moves):
+                position.play(col)
+                score = self.minimax(position, depth-1, alpha, beta, False)
+                position.undo()
+                if score > value:
+                    value, best_move = score, col
+                alpha = max(alpha, value)
+                if alpha >= beta:
+                    self.ordering.record_cutoff(position, col, index, depth)
+                    break
+        else:
+            value = float('inf')
+            for index, col in enumerate(valid_moves):
+                position.play(col)
+                score = self.minimax(position, depth-1, alpha, beta, True)
+                position.undo()
+                if score < value:
+                    value, best_move = score, col
+                beta = min(beta, value)
+                if alpha >= beta:
+                    self.ordering.record_cutoff(position, col, index, depth)
+                    break
+        
+        if value <= alpha_orig:
+            bound = UPPER
+        elif value >= beta_orig:
+            bound = LOWER
+        else:
+            bound = EXACT
+        if mirrored and best_move is not None:
+            best_move = position.cols - 1 - best_move
+        self.tt.store(key, value, depth, bound, best_move)
+        return value
+    
+    def prune_moves(self, position: Position, moves: List[int]) -> Tuple[Optional[float], List[int]]:
+        """Threat pruning as done at every inner node of minimax: the score
+        of a decided position and no moves, or None and the moves to search."""
+        if not self.threat_pruning:
+            return None, moves
+        # A side that can win now scores a win, one that cannot stop the
+        # opponent's next move a loss; otherwise drop the moves that hand
+        # the opponent an immediate win
+        status, cells = classify(position)
+        if status != OPEN:
+            winner = position.to_move if status == WIN else 3 - position.to_move
+            return (1000 if winner == self.player_num else -1000), []
+        heights = position.heights
+        return None, [col for col in moves if cells >> heights[col] & 1]
+    
+    def endgame_value(self, position: Position) -> Optional[float]:
+        """Win, loss or draw score of a position in the endgame table."""
+        score = self.endgame.lookup(position)
+        if score is None:
+            return None
+        if score == 0:
+            return 0
+        winner = position.to_move if score > 0 else 3 - position.to_move
+        return 1000 if winner == self.player_num else -1000
+    
+    def evaluate_position(self, position: EvalPosition) -> float:
+        """Same score as evaluate_board, read from the incrementally kept
+        totals, or the learned evaluator's score when there is one."""
+        if position.winner == self.player_num:
+            return 1000
+        elif position.winner == 3 - self.player_num:
+            return -1000
+        elif position.game_over:
+            return 0
+        
+        if self.evaluator is not None:
+            return self.evaluator.evaluate(position, self.player_num)
+        return position.scores[self.player_num - 1]
+    
+    def evaluate_board(self, game: Connect4) -> float:
+        """Evaluate the board position for the AI player."""
+        if game.winner == self.player_num:
+            return 1000
+        elif game.winner == 3 - self.player_num:
+            return -1000
+        elif game.game_over:
+            return 0
+        
+        score = 0
+        center_col = game.cols // 2
+        center_array = [game.board[row][center_col] for row in range(game.rows)]
+        center_count = center_array.count(self.player_num)
+        score += center_count * 3
+        
+        # Evaluate horizontal opportunities
+        for row in range(game.rows):
+            for col in range(game.cols - 3):
+                window = game.board[row, col:col+4]
+                score += self.evaluate_window(window)
+        
+        # Evaluate vertical opportunities
+        for col in range(game.cols):
+            for row in range(game.rows - 3):
+                window = [game.board[row+i][col] for i in range(4)]
+                score += self.evaluate_window(window)
+        
+        # Evaluate diagonal (top-left to bottom-right) opportunities
+        for row in range(game.rows - 3):
+            for col in range(game.cols - 3):
+                window = [game.board[row+i][col+i] for i in range(4)]
+                score += self.evaluate_window(window)
+        
+        # Evaluate diagonal (top-right to bottom-left) opportunities
+        for row in range(game.rows - 3):
+            for col in range(3, game.cols):
+                window = [game.board[row+i][col-i] for i in range(4)]
+                score += self.evaluate_window(window)
+        
+        return score
+    
+    def evaluate_window(self, window: List[int]) -> float:
+        """Evaluate a window of 4 positions for potential."""
+        score = 0
+        opponent = 3 - self.player_num
+        
+        if list(window).count(self.player_num) == 4:
+            score += 100
+        elif list(window).count(self.player_num) == 3 and list(window).count(0) == 1:
+            score += 5
+        elif list(window).count(self.player_num) == 2 and list(window).count(0) == 2:
+            score += 2
+        
+        if list(window).count(opponent) == 3 and list(window).count(0) == 1:
+            score -= 4
+        
+        return score
+
+
+class HumanPlayer:
+    def __init__(self, player_num: int):
+        self.player_num = player_num
@@ -0,0 +1,192 @@
+"""Incremental version of the AIPlayer.evaluate_board heuristic.
+
+evaluate_board scores every window of four cells from the counts of each
+player's pieces in it.  EvalPosition keeps those counts for every window
+and both players' totals up to date on each play/undo, touching only the
+windows through the changed cell, so scoring a leaf is a lookup.
+"""
+
+import random
+
+from bitboard import Position, popcount, _restore
+
+
+def window_score(own: int, opp: int) -> int:
+    """Score of one window holding ``own`` of our pieces and ``opp`` of theirs.
+
+    Mirrors AIPlayer.evaluate_window.
+    """
+    empty = 4 - own - opp
+    score = 0
+    if own == 4:
+        score += 100
+    elif own == 3 and empty == 1:
+        score += 5
+    elif own == 2 and empty == 2:
+        score += 2
+    if opp == 3 and empty == 1:
+        score -= 4
+    return score
+
+
+# Window state is encoded as player1_count * 5 + player2_count
+_STATES = range(25)
+_SCORE = (
+    tuple(window_score(s // 5, s % 5) if s // 5 + s % 5 <= 4 else 0 for s in _STATES),
+    tuple(window_score(s % 5, s // 5) if s // 5 + s % 5 <= 4 else 0 for s in _STATES),
+)
+_STEP = (5, 1)  # state increment for a piece of player 1, player 2
+
+# _DELTA[mover][perspective][state]: change of the perspective player's
+# window score when ``mover`` adds a piece to a window in ``state``
+_DELTA = tuple(
+    tuple(
+        tuple(_SCORE[persp][s + _STEP[mover]] - _SCORE[persp][s] if s + _STEP[mover] < 25 else 0
+              for s in _STATES)
+        for persp in (0, 1)
+    )
+    for mover in (0, 1)
+)
+
+
+def scan_score(position: Position, player: int) -> int:
+    """Heuristic score of a non-terminal position for ``player``, by full scan."""
+    own = position.boards[player - 1]
+    opp = position.boards[2 - player]
+    geo = position.geometry
+    score = popcount(own & geo.center_mask) * 3
+    for window in geo.windows:
+        score += window_score(popcount(own & window), popcount(opp & window))
+    return score
+
+
+class EvalPosition(Position):
+    """Position that keeps both players' heuristic scores current."""
+
+    __slots__ = ("window_state", "scores")
+
+    def __init__(self, rows: int = 6, cols: int = 7):
+        super().__init__(rows, cols)
+        self.window_state = [0] * len(self.geometry.windows)
+        self.scores = [0, 0]
+
+    @classmethod
+    def from_position(cls, position: Position) -> "EvalPosition":
+        other = cls.__new__(cls)
+        other.geometry = position.geometry
+        other.rows = position.rows
+        other.cols = position.cols
+        other.boards = list(position.boards)
+        other.heights = list(position.heights)
+        other.to_move = position.to_move
+        other.winner = position.winner
+        other.moves = list(position.moves)
+        p1, p2 = other.boards
+        other.window_state = [popcount(p1 & w) * 5 + popcount(p2 & w) for w in other.geometry.windows]
+        other.scores = [scan_score(other, 1), scan_score(other, 2)]
+        return other
+
+    def __reduce__(self):
+        return _restore_eval, Position.__reduce__(self)[1]
+
+    def copy(self) -> "EvalPosition":
+        other = Position.copy(self)
+        other.window_state = list(self.window_state)
+        other.scores = list(self.scores)
+        return other
+
+    def play(self, col: int) -> int:
+        bit = Position.play(self, col)
+        mover = 2 - self.to_move  # 0 for player 1, 1 for player 2
+        geo = self.geometry
+        state = self.window_state
+        d1, d2 = _DELTA[mover]
+        step = _STEP[mover]
+        s1 = s2 = 0
+        for w in geo.cell_windows[bit]:
+            s = state[w]
+            s1 += d1[s]
+            s2 += d2[s]
+            state[w] = s + step
+        if (1 << bit) & geo.center_mask:
+            if mover == 0:
+                s1 += 3
+            else:
+                s2 += 3
+        scores = self.scores
+        scores[0] += s1
+        scores[1] += s2
+        return bit
+
+    def undo(self) -> int:
+        col = Position.undo(self)
+        bit = self.heights[col]
+        mover = self.to_move - 1
+        geo = self.geometry
+        state = self.window_state
+        d1, d2 = _DELTA[mover]
+        step = _STEP[mover]
+        s1 = s2 = 0
+        for w in geo.cell_windows[bit]:
+            s = state[w] - step
+            s1 += d1[s]
+            s2 += d2[s]
+            state[w] = s
+        if (1 << bit) & geo.center_mask:
+            if mover == 0:
+                s1 += 3
+            else:
+                s2 += 3
+        scores = self.scores
+        scores[0] -= s1
+        scores[1] -= s2
+        return col
+
+    def score(self, player: int) -> int:
+        """Heuristic score for ``player``, ignoring wins and draws."""
+        return self.scores[player - 1]
+
+
+def _restore_eval(*args) -> EvalPosition:
+    return EvalPosition.from_position(_restore(*args))
+
+
+def check_incremental(reference, games: int = 200, seed: int = 0, rows: int = 6, cols: int = 7) -> int:
+    """Play random games forwards and backwards, comparing EvalPosition
+    scores with ``reference(position, player)`` at every step.
+
+    Returns the number of positions checked; raises AssertionError on the
+    first mismatch.
+    """
+    rng = random.Random(seed)
+    checked = 0
+    for _ in range(games):
+        position = EvalPosition(rows, cols)
+        while not position.game_over:
+            position.play(rng.choice(position.valid_moves()))
+            if position.game_over:
+                break
+            for player in (1, 2):
+                expected = reference(position, player)
+                assert position.score(player) == expected, (position.moves, player, position.score(player), expected)
+            checked += 1
+        # Unwinding must restore every intermediate score as well
+        while position.moves:
+            position.undo()
+            for player in (1, 2):
+                assert position.score(player) == scan_score(position, player), (position.moves, player)
+    return checked
+
+
+if __name__ == "__main__":
+    # Compare against the original NumPy evaluate_board on random games
+    from engine import AIPlayer, Connect4
+
+    def evaluate_board(position: Position, player: int) -> int:
+        game = Connect4(position.rows, position.cols)
+        game.board = [[position.cell(r, c) for c in range(position.cols)] for r in range(position.rows)]
+        return AIPlayer(player).evaluate_board(game)
+
+    for rows, cols in ((6, 7), (7, 8), (7, 9), (8, 10)):
+        checked = check_incremental(evaluate_board, 200 if (rows, cols) == (6, 7) else 30, rows=rows, cols=cols)
+        print(f"{cols} x {rows}: {checked} positions match evaluate_board")
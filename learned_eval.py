@@ -0,0 +1,419 @@
+"""Learned evaluation: a small MLP over window features, fitted to self-play.
+
+The features of a position, from one player's point of view, are how many
+windows of four hold each mix of that player's and the opponent's pieces
+(1-3 own with no opponent, 1-3 opponent with no own, and the mixed ones),
+the pieces each has in the center column and whether the player is to
+move.  They are read straight off EvalPosition's window states.  A network
+with one ReLU hidden layer (or none, for a linear model) maps them to
+``scale * tanh(z)``, an expected result in the same units as the search's
++/-1000 for a won or lost position.
+
+At a node one ply above the leaves, the search scores every child in one
+NumPy pass (evaluate_children) without playing them: the normalization and
+first layer are folded into per-window-state tables, and a stone changes
+only the windows through its cell, one row of a cell/window incidence
+matrix, so all children take one gather and one matrix product.
+
+Weights live in a versioned JSON file, trained on the CPU from the outcomes
+of self-play games:
+
+    python learned_eval.py train --games 2000 -o eval_weights.json
+    python learned_eval.py bench --depths 2 4 --games 40
+
+``bench`` compares leaves/sec with the incremental heuristic and plays the
+two against each other at equal depth, reporting the score and the nodes
+each searched per move.
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from bitboard import geometry, popcount
+from evaluation import EvalPosition
+
+FORMAT = "connect4-eval"
+VERSION = 1
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "eval_weights.json")
+
+# (own, opponent) piece counts of the windows counted as features
+WINDOW_FEATURES = ((1, 0), (2, 0), (3, 0), (0, 1), (0, 2), (0, 3), (1, 1), (2, 1), (1, 2), (2, 2), (3, 1), (1, 3))
+FEATURE_NAMES = [f"windows_{own}_{opp}" for own, opp in WINDOW_FEATURES] + ["center_own", "center_opp", "to_move"]
+
+
+def _select() -> np.ndarray:
+    """For each point of view, the (25, len(WINDOW_FEATURES)) matrix taking
+    counts of window states (p1 * 5 + p2) to feature counts."""
+    select = np.zeros((2, 25, len(WINDOW_FEATURES)))
+    for index, (own, opp) in enumerate(WINDOW_FEATURES):
+        select[0, own * 5 + opp, index] = 1
+        select[1, opp * 5 + own, index] = 1
+    return select
+
+
+SELECT = _select()
+
+
+@lru_cache(maxsize=None)
+def _incidence(rows: int, cols: int) -> np.ndarray:
+    """Per board size, which windows hold each cell as a (bits, windows + 1)
+    0/1 matrix; the last column marks the center column's cells."""
+    geo = geometry(rows, cols)
+    incidence = np.zeros((geo.h1 * cols, len(geo.windows) + 1))
+    for bit, windows in geo.cell_windows.items():
+        incidence[bit, list(windows)] = 1
+        incidence[bit, -1] = geo.center_mask >> bit & 1
+    return incidence
+
+
+def window_features(states: np.ndarray, player: int) -> np.ndarray:
+    """(N, windows) window states -> (N, len(WINDOW_FEATURES)) counts for ``player``."""
+    n = states.shape[0]
+    offsets = (np.arange(n) * 25)[:, None]
+    counts = np.bincount((states + offsets).ravel(), minlength=n * 25).reshape(n, 25)
+    return counts @ SELECT[player - 1]
+
+
+class LearnedEvaluator:
+    """MLP evaluation loaded from a weights file."""
+
+    def __init__(self, weights: Dict):
+        if weights.get("format") != FORMAT or weights.get("version") != VERSION:
+            raise ValueError(f"not a version {VERSION} {FORMAT} weights file")
+        if weights["features"] != FEATURE_NAMES:
+            raise ValueError("weights were trained on different features")
+        self.weights = weights
+        self.mean = np.array(weights["mean"])
+        self.std = np.array(weights["std"])
+        self.hidden = weights["hidden"]
+        self.w1 = np.array(weights["w1"]) if self.hidden else None
+        self.b1 = np.array(weights["b1"]) if self.hidden else None
+        self.w2 = np.array(weights["w2"])
+        self.b2 = float(weights["b2"])
+        self.scale = float(weights["scale"])
+        # The normalization and first layer folded together: a position's
+        # first layer is the sum of one table row per window state plus
+        # weights times its center counts and side to move.  Tables are
+        # per player (point of view) and mover (whose move makes the
+        # children): a window state's row, how a stone of the mover's
+        # changes it and whether that makes four; the last row is a stone
+        # in the center column, indexed through an extra incidence column
+        first = self.w1 if self.hidden else self.w2[:, None]
+        first = first / self.std[:, None]
+        bias = (self.b1 if self.hidden else np.array([self.b2])) - self.mean @ first
+        units = first.shape[1]
+        self._units = units
+        self._tables = [[None, None], [None, None]]
+        self._extra = [[None, None], [None, None]]
+        for player in (1, 2):
+            rows = SELECT[player - 1] @ first[:len(WINDOW_FEATURES)]
+            for mover in (1, 2):
+                step = 5 if mover == 1 else 1
+                table = np.zeros((26, 2 * units + 1))
+                table[:25, :units] = rows
+                table[:25 - step, units:2 * units] = rows[step:] - rows[:-step]
+                table[3 * step, -1] = 1
+                table[25, units:2 * units] = first[-3] if mover == player else first[-2]
+                self._tables[player - 1][mover - 1] = table
+                # Own and opponent center stones, then the constant, for a
+                # position that ``mover`` has just moved into
+                self._extra[player - 1][mover - 1] = np.array(
+                    [first[-3], first[-2], bias + first[-1] if mover != player else bias])
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_PATH) -> "LearnedEvaluator":
+        with open(path) as f:
+            return cls(json.load(f))
+
+    def save(self, path: str):
+        with open(path, "w") as f:
+            json.dump(self.weights, f, indent=1)
+            f.write("\n")
+
+    def predict(self, features: np.ndarray) -> np.ndarray:
+        """Scores of an (N, features) array."""
+        x = (features - self.mean) / self.std
+        if self.hidden:
+            x = np.maximum(x @ self.w1 + self.b1, 0.0)
+        return self.scale * np.tanh(x @ self.w2 + self.b2)
+
+    def _output(self, first: np.ndarray) -> np.ndarray:
+        """Scores from (N, units) first layer values, rounded so that sums
+        taken in another order (a mirrored position, a parent's batch or a
+        single evaluation) give the same score, as the heuristic's integers do."""
+        if self.hidden:
+            z = np.maximum(first, 0.0) @ self.w2 + self.b2
+        else:
+            z = first[:, 0]
+        return np.round(self.scale * np.tanh(z), 6)
+
+    def evaluate(self, position: EvalPosition, player: int) -> float:
+        """Score of a non-terminal position for ``player``."""
+        return self.evaluate_children(position, [], player, parent=True)[0]
+
+    def evaluate_children(self, position: EvalPosition, moves: List[int], player: int,
+                          parent: bool = False) -> List[float]:
+        """Scores for ``player`` of the positions after each move, in one
+        batch; a move that wins scores +/-1000 and one that fills the board 0.
+
+        The children are not played: a move changes only the windows
+        through its cell, one row of the incidence matrix, so each child's
+        first layer is the parent's plus that row times the change a stone
+        makes to each window's contribution.  With ``parent`` the score is
+        of the position itself."""
+        units = self._units
+        mover = 3 - position.to_move if parent else position.to_move
+        table = self._tables[player - 1][mover - 1][position.window_state + [25]]
+        center = position.geometry.center_mask
+        counts = [popcount(position.boards[player - 1] & center), popcount(position.boards[2 - player] & center), 1]
+        base = table[:-1, :units].sum(axis=0) + np.dot(counts, self._extra[player - 1][mover - 1])
+        if parent:
+            return self._output(base[None]).tolist()
+
+        incidence = _incidence(position.rows, position.cols)
+        change = incidence[[position.heights[col] for col in moves]] @ table[:, units:]
+        scores = self._output(change[:, :units] + base)
+        if len(position.moves) + 1 == position.geometry.size:
+            scores[:] = 0.0
+        scores[change[:, -1] > 0] = 1000.0 if mover == player else -1000.0
+        return scores.tolist()
+
+
+def load_evaluator(path: str = DEFAULT_PATH) -> Optional[LearnedEvaluator]:
+    """Load weights if the file exists, else return None."""
+    if not os.path.exists(path):
+        return None
+    return LearnedEvaluator.load(path)
+
+
+def self_play(games: int, depth: int = 2, random_plies: int = 4, rows: int = 6, cols: int = 7,
+              seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """Features and results (+1 win, 0 draw, -1 loss) of every position of
+    hard-AI self-play games, from both players' points of view.
+
+    The first ``random_plies`` moves of each game are random, so the games
+    differ."""
+    from engine import AIPlayer, Connect4
+
+    rng = random.Random(seed)
+    random.seed(seed)
+    states, centers, to_move, results = [], [], [], []
+    center_mask = geometry(rows, cols).center_mask
+    for _ in range(games):
+        game = Connect4(rows, cols)
+        players = {player: AIPlayer(player, "hard", depth=depth) for player in (1, 2)}
+        position = EvalPosition(rows, cols)
+        game_states = []
+        while not game.game_over:
+            if len(game.moves) < random_plies:
+                col = rng.choice(game.get_valid_moves())
+            else:
+                col = players[game.current_player].get_move(game)
+            game.drop_piece(col)
+            position.play(col)
+            if not position.game_over:
+                game_states.append((list(position.window_state),
+                                    (popcount(position.boards[0] & center_mask),
+                                     popcount(position.boards[1] & center_mask)),
+                                    position.to_move))
+        for state, center, mover in game_states:
+            for player in (1, 2):
+                states.append(state)
+                centers.append(center if player == 1 else center[::-1])
+                to_move.append(mover == player)
+                results.append(0 if game.winner is None else 1 if game.winner == player else -1)
+
+    states = np.array(states, dtype=np.intp)
+    x = np.empty((len(states), len(FEATURE_NAMES)))
+    half = np.arange(len(states)) % 2 == 0  # rows alternate player 1, player 2
+    for player, rows_of in ((1, half), (2, ~half)):
+        x[rows_of, :len(WINDOW_FEATURES)] = window_features(states[rows_of], player)
+    x[:, -3:-1] = centers
+    x[:, -1] = to_move
+    return x, np.array(results, dtype=np.float64)
+
+
+def train(x: np.ndarray, y: np.ndarray, hidden: int = 16, epochs: int = 60, batch: int = 256,
+          lr: float = 0.003, scale: float = 500.0, seed: int = 0) -> Tuple[Dict, float]:
+    """Fit an MLP (linear model if ``hidden`` is 0) to predict ``y`` with
+    tanh outputs, by minibatch Adam on mean squared error.
+
+    Returns the weights dict and the loss on a 10% held-out split.
+    """
+    rng = np.random.default_rng(seed)
+    order = rng.permutation(len(x))
+    split = len(x) // 10
+    valid, fit = order[:split], order[split:]
+    mean = x[fit].mean(axis=0)
+    std = x[fit].std(axis=0) + 1e-6
+    xs = (x - mean) / std
+
+    features = x.shape[1]
+    params = {"w2": rng.normal(0, 0.1, hidden or features), "b2": np.zeros(1)}
+    if hidden:
+        params["w1"] = rng.normal(0, np.sqrt(2 / features), (features, hidden))
+        params["b1"] = np.zeros(hidden)
+    moments = {name: (np.zeros_like(p), np.zeros_like(p)) for name, p in params.items()}
+    beta1, beta2, t = 0.9, 0.999, 0
+
+    def forward(inputs):
+        h = np.maximum(inputs @ params["w1"] + params["b1"], 0.0) if hidden else inputs
+        return h, np.tanh(h @ params["w2"] + params["b2"][0])
+
+    for _ in range(epochs):
+        rng.shuffle(fit)
+        for start in range(0, len(fit), batch):
+            rows_ = fit[start:start + batch]
+            inputs, target = xs[rows_], y[rows_]
+            h, out = forward(inputs)
+            dz = 2 * (out - target) * (1 - out * out) / len(rows_)
+            grads = {"w2": h.T @ dz, "b2": np.array([dz.sum()])}
+            if hidden:
+                dh = np.outer(dz, params["w2"]) * (h > 0)
+                grads["w1"] = inputs.T @ dh
+                grads["b1"] = dh.sum(axis=0)
+            t += 1
+            for name, grad in grads.items():
+                m, v = moments[name]
+                m *= beta1
+                m += (1 - beta1) * grad
+                v *= beta2
+                v += (1 - beta2) * grad * grad
+                params[name] -= lr * (m / (1 - beta1 ** t)) / (np.sqrt(v / (1 - beta2 ** t)) + 1e-8)
+
+    _, out = forward(xs[valid])
+    valid_loss = float(((out - y[valid]) ** 2).mean())
+    weights = {
+        "format": FORMAT,
+        "version": VERSION,
+        "features": FEATURE_NAMES,
+        "hidden": hidden,
+        "scale": scale,
+        "mean": mean.tolist(),
+        "std": std.tolist(),
+        "w1": params["w1"].tolist() if hidden else None,
+        "b1": params["b1"].tolist() if hidden else None,
+        "w2": params["w2"].tolist(),
+        "b2": float(params["b2"][0]),
+    }
+    return weights, valid_loss
+
+
+def bench_leaves(evaluator: LearnedEvaluator, parents: int = 2000, seed: int = 0) -> Dict[str, float]:
+    """Leaves/sec scoring every child of random positions, with the
+    incremental heuristic (play, score, undo) and with evaluate_children."""
+    from engine import AIPlayer
+
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < parents:
+        position = EvalPosition()
+        for _ in range(rng.randint(0, 30)):
+            position.play(rng.choice(position.valid_moves()))
+            if position.game_over:
+                break
+        if not position.game_over:
+            positions.append(position)
+    leaves = sum(len(position.valid_moves()) for position in positions)
+    ai = AIPlayer(1, "hard")
+
+    start = time.perf_counter()
+    for position in positions:
+        for col in position.valid_moves():
+            position.play(col)
+            ai.evaluate_position(position)
+            position.undo()
+    heuristic = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for position in positions:
+        evaluator.evaluate_children(position, position.valid_moves(), 1)
+    learned = time.perf_counter() - start
+    return {"leaves": leaves, "heuristic_leaves_per_sec": leaves / heuristic,
+            "learned_leaves_per_sec": leaves / learned}
+
+
+def match(evaluator: LearnedEvaluator, depth: int, games: int) -> Dict[str, float]:
+    """Hard AI at ``depth`` with the learned evaluator against the same AI
+    with the heuristic, from different two-ply openings, swapping colors."""
+    from engine import AIPlayer, Connect4
+
+    openings = [(a, b) for a in range(7) for b in range(7)]
+    random.Random(depth).shuffle(openings)
+    points = 0.0
+    nodes = {"learned": 0, "heuristic": 0}
+    moves = {"learned": 0, "heuristic": 0}
+    elapsed = {"learned": 0.0, "heuristic": 0.0}
+    for index in range(games):
+        learned_player = 1 if index % 2 == 0 else 2
+        players = {learned_player: ("learned", AIPlayer(learned_player, "hard", depth=depth, evaluator=evaluator)),
+                   3 - learned_player: ("heuristic", AIPlayer(3 - learned_player, "hard", depth=depth))}
+        game = Connect4()
+        for col in openings[(index // 2) % len(openings)]:
+            game.drop_piece(col)
+        while not game.game_over:
+            name, ai = players[game.current_player]
+            stats = ai.search(game)
+            nodes[name] += stats.nodes
+            moves[name] += 1
+            elapsed[name] += stats.elapsed
+            game.drop_piece(stats.move)
+        points += 0.5 if game.winner is None else float(game.winner == learned_player)
+    return {
+        "depth": depth,
+        "games": games,
+        "learned_score": points / games,
+        "learned_nodes_per_move": nodes["learned"] / max(1, moves["learned"]),
+        "heuristic_nodes_per_move": nodes["heuristic"] / max(1, moves["heuristic"]),
+        "learned_ms_per_move": 1000 * elapsed["learned"] / max(1, moves["learned"]),
+        "heuristic_ms_per_move": 1000 * elapsed["heuristic"] / max(1, moves["heuristic"]),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train and benchmark the learned evaluation.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    fit = commands.add_parser("train", help="fit weights to self-play games")
+    fit.add_argument("--games", type=int, default=2000)
+    fit.add_argument("--depth", type=int, default=2, help="search depth of the self-play AIs")
+    fit.add_argument("--random-plies", type=int, default=4, help="random opening moves per game")
+    fit.add_argument("--hidden", type=int, default=16, help="hidden units, 0 for a linear model")
+    fit.add_argument("--epochs", type=int, default=60)
+    fit.add_argument("--seed", type=int, default=0)
+    fit.add_argument("-o", "--output", default=DEFAULT_PATH)
+
+    bench = commands.add_parser("bench", help="leaves/sec and strength against the heuristic")
+    bench.add_argument("--weights", default=DEFAULT_PATH)
+    bench.add_argument("--depths", type=int, nargs="+", default=[2, 4])
+    bench.add_argument("--games", type=int, default=40, help="games per depth")
+    args = parser.parse_args(argv)
+
+    if args.command == "train":
+        start = time.perf_counter()
+        x, y = self_play(args.games, args.depth, args.random_plies, seed=args.seed)
+        played = time.perf_counter() - start
+        weights, valid_loss = train(x, y, args.hidden, args.epochs, seed=args.seed)
+        weights["trained_on"] = {"games": args.games, "positions": len(x), "depth": args.depth,
+                                 "valid_loss": round(valid_loss, 4)}
+        LearnedEvaluator(weights).save(args.output)
+        print(f"{args.games} games, {len(x)} samples in {played:.1f}s; trained in "
+              f"{time.perf_counter() - start - played:.1f}s, held-out loss {valid_loss:.4f} "
+              f"(predicting 0: {float((y * y).mean()):.4f}) -> {args.output}", file=sys.stderr)
+    else:
+        evaluator = LearnedEvaluator.load(args.weights)
+        report = {"leaves": bench_leaves(evaluator),
+                  "matches": [match(evaluator, depth, args.games) for depth in args.depths]}
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Load generator for server.py.
+
+Opens ``--clients`` connections, each playing ``--games`` games one after
+another with random legal moves, and reports move throughput, round-trip
+latency percentiles and the server's own metrics at the end.  With
+``--local`` it starts a server in this process first, so one command
+measures the whole thing:
+
+    python loadgen.py --local --clients 500 --games 2 --difficulty medium
+    python loadgen.py --port 8765 --clients 200 --difficulty hard --depth 4
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import Dict, List
+
+from server import GameServer, percentile
+
+
+class Client:
+    """One connection sending a request and waiting for its reply."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect(cls, host: str, port: int, unix: str = None) -> "Client":
+        if unix:
+            return cls(*await asyncio.open_unix_connection(unix))
+        return cls(*await asyncio.open_connection(host, port))
+
+    async def request(self, **request) -> Dict:
+        self.writer.write(json.dumps(request).encode() + b"\n")
+        await self.writer.drain()
+        line = await self.reader.readline()
+        if not line:
+            raise ConnectionError("server closed the connection")
+        return json.loads(line)
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+async def play_games(client: Client, games: int, new_game: Dict, rng: random.Random,
+                     latencies: List[float], errors: Dict[str, int]):
+    for _ in range(games):
+        state = await client.request(op="new", **new_game)
+        if not state["ok"]:
+            errors[state["error"]] = errors.get(state["error"], 0) + 1
+            continue
+        while not state["game_over"]:
+            start = time.perf_counter()
+            reply = await client.request(op="move", session=state["session"], col=rng.choice(state["valid_moves"]))
+            if reply["ok"]:
+                latencies.append(time.perf_counter() - start)
+                state = reply
+            else:
+                errors[reply["error"]] = errors.get(reply["error"], 0) + 1
+                await asyncio.sleep(0.05)  # back off before retrying
+        await client.request(op="close", session=state["session"])
+
+
+async def run(args) -> Dict:
+    game_server = server = None
+    if args.local:
+        game_server = GameServer(args.workers, args.max_pending, args.deadline_ms)
+        server = await game_server.start(args.host, args.port, args.unix)
+    try:
+        new_game = {"difficulty": args.difficulty}
+        if args.depth is not None:
+            new_game["depth"] = args.depth
+        if args.time_budget_ms is not None:
+            new_game["time_budget_ms"] = args.time_budget_ms
+        clients = [await Client.connect(args.host, args.port, args.unix) for _ in range(args.clients)]
+        latencies, errors = [], {}
+        start = time.perf_counter()
+        await asyncio.gather(*(play_games(client, args.games, new_game, random.Random(args.seed + index),
+                                          latencies, errors)
+                               for index, client in enumerate(clients)))
+        elapsed = time.perf_counter() - start
+        metrics = await clients[0].request(op="metrics")
+        for client in clients:
+            await client.close()
+    finally:
+        if server is not None:
+            while game_server.connections:  # let the handlers see the clients go
+                await asyncio.sleep(0.01)
+            server.close()
+            await server.wait_closed()
+            game_server.close()
+
+    return {
+        "clients": args.clients,
+        "games": args.clients * args.games,
+        "moves": len(latencies),
+        "elapsed": round(elapsed, 3),
+        "moves_per_sec": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": {name: round(percentile(latencies, q) * 1000, 3)
+                       for name, q in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99))},
+        "errors": errors,
+        "server": metrics,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play many concurrent random games against server.py.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="connect to this Unix socket path instead")
+    parser.add_argument("-c", "--clients", type=int, default=100, help="concurrent connections")
+    parser.add_argument("-g", "--games", type=int, default=1, help="games per connection")
+    parser.add_argument("--difficulty", default="medium")
+    parser.add_argument("--depth", type=int, default=None)
+    parser.add_argument("--time-budget-ms", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--local", action="store_true", help="start a server in this process")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="AI processes for --local")
+    parser.add_argument("--max-pending", type=int, default=256, help="queue limit for --local")
+    parser.add_argument("--deadline-ms", type=int, default=5000, help="AI move deadline for --local")
+    args = parser.parse_args(argv)
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""Monte Carlo Tree Search for the "mcts" difficulty.
+
+Plain UCT: each playout walks down the tree picking the child with the best
+upper confidence bound, adds one new node, finishes the game with random
+moves and backs the result up the path.  The move played is the most
+visited child of the root.
+
+Rollouts run on two integers and a list of column heights, the same layout
+as bitboard.Position, so a playout is a few dozen integer operations per
+ply.  Tree nodes use ``__slots__``.  Between moves the tree is kept and
+re-rooted at the position actually reached, so playouts spent on the
+opponent's chosen reply are not thrown away.
+
+Run ``python mcts.py [playouts] [games]`` to report playouts/sec and play
+MCTS against the depth-4 minimax search.
+"""
+
+import math
+import random
+import sys
+import time
+from typing import List, Optional
+
+from bitboard import Geometry, Position, has_won
+
+
+class MCTSNode:
+    """One position in the search tree, reached by playing ``move``."""
+
+    __slots__ = ("move", "parent", "children", "untried", "visits", "wins", "player", "winner")
+
+    def __init__(self, move: Optional[int], parent: Optional["MCTSNode"], player: int,
+                 untried: List[int], winner: Optional[int]):
+        self.move = move
+        self.parent = parent
+        self.children = []
+        self.untried = untried  # moves not expanded yet, popped from the end
+        self.visits = 0
+        self.wins = 0.0  # from the point of view of ``player``
+        self.player = player  # who played ``move``
+        self.winner = winner  # set on terminal nodes, 0 for a draw
+
+
+class MCTS:
+    """UCT search tree that lives across the moves of one game."""
+
+    def __init__(self, exploration: float = 1.4, stop_event=None, seed: Optional[int] = None):
+        self.exploration = exploration
+        self.stop_event = stop_event
+        self.rng = random.Random(seed)
+        self.root = None
+        self.root_moves = None  # move list of the root position
+        self.root_cols = None
+        self.playouts = 0
+        self.plies = 0
+        self.reused_playouts = 0
+        self.max_depth = 0  # deepest tree node reached by the last search
+
+    def _new_node(self, geo: Geometry, move: Optional[int], parent: Optional[MCTSNode], player: int,
+                  boards: List[int], heights: List[int], stones: int) -> MCTSNode:
+        """Node for the position after ``player`` played ``move``."""
+        if has_won(boards[player - 1], geo.h1):
+            untried, winner = [], player
+        elif stones == geo.size:
+            untried, winner = [], 0
+        else:
+            untried = [col for col in range(geo.cols) if heights[col] < geo.top[col]]
+            winner = None
+            self.rng.shuffle(untried)
+        return MCTSNode(move, parent, player, untried, winner)
+
+    def _reroot(self, position: Position):
+        """Make the tree's root the given position, keeping its subtree if
+        the tree already holds it."""
+        moves = position.moves
+        node = None
+        if (self.root is not None and self.root_moves is not None
+                and len(moves) >= len(self.root_moves) and moves[:len(self.root_moves)] == self.root_moves
+                and self.root_cols == position.cols):
+            node = self.root
+            for col in moves[len(self.root_moves):]:
+                node = next((child for child in node.children if child.move == col), None)
+                if node is None:
+                    break
+        if node is None:
+            node = self._new_node(position.geometry, None, None, 3 - position.to_move,
+                                  position.boards, position.heights, len(moves))
+        node.parent = None  # let the rest of the old tree go
+        self.root = node
+        self.root_moves = list(moves)
+        self.root_cols = position.cols
+
+    def search(self, position: Position, playouts: Optional[int] = None,
+               deadline: Optional[float] = None) -> int:
+        """Run playouts from ``position`` and return the most visited move.
+
+        Stops after ``playouts`` playouts or at the ``deadline``
+        (time.perf_counter), whichever comes first; at least one playout
+        per legal move always runs unless the stop event is set.  Returns
+        None if stopped before any move was tried.
+        """
+        self._reroot(position)
+        root = self.root
+        self.reused_playouts = root.visits
+        self.playouts = self.plies = self.max_depth = 0
+        geo = position.geometry
+        h1, top = geo.h1, geo.top
+        c = self.exploration
+        log = math.log
+        sqrt = math.sqrt
+        rng = self.rng
+        stop = self.stop_event
+        minimum = len(root.untried) + len(root.children)
+        stones = len(position.moves)
+
+        while True:
+            if playouts is not None and self.playouts >= playouts:
+                break
+            if stop is not None and not self.playouts & 63 and stop.is_set():
+                break
+            if (deadline is not None and self.playouts >= minimum and not self.playouts & 63
+                    and time.perf_counter() > deadline):
+                break
+
+            # Selection
+            node = root
+            boards = list(position.boards)
+            heights = list(position.heights)
+            to_move = position.to_move
+            depth = 0
+            while not node.untried and node.children:
+                scale = c * sqrt(log(node.visits))
+                best, best_value = None, -1.0
+                for child in node.children:
+                    value = child.wins / child.visits + scale / sqrt(child.visits)
+                    if value > best_value:
+                        best, best_value = child, value
+                node = best
+                bit = heights[node.move]
+                heights[node.move] = bit + 1
+                boards[to_move - 1] |= 1 << bit
+                to_move = 3 - to_move
+                depth += 1
+
+            # Expansion
+            if node.untried:
+                col = node.untried.pop()
+                bit = heights[col]
+                heights[col] = bit + 1
+                boards[to_move - 1] |= 1 << bit
+                depth += 1
+                child = self._new_node(geo, col, node, to_move, boards, heights, stones + depth)
+                to_move = 3 - to_move
+                node.children.append(child)
+                node = child
+            tree_depth = depth
+
+            # Rollout
+            winner = node.winner
+            if winner is None:
+                available = [col for col in range(position.cols) if heights[col] < top[col]]
+                while True:
+                    index = rng.randrange(len(available))
+                    col = available[index]
+                    bit = heights[col]
+                    heights[col] = bit + 1
+                    if bit + 1 == top[col]:
+                        available[index] = available[-1]
+                        available.pop()
+                    bb = boards[to_move - 1] | (1 << bit)
+                    boards[to_move - 1] = bb
+                    depth += 1
+                    if has_won(bb, h1):
+                        winner = to_move
+                        break
+                    if not available:
+                        winner = 0
+                        break
+                    to_move = 3 - to_move
+
+            # Backpropagation
+            while node is not None:
+                node.visits += 1
+                if winner == node.player:
+                    node.wins += 1.0
+                elif winner == 0:
+                    node.wins += 0.5
+                node = node.parent
+            self.playouts += 1
+            self.plies += depth
+            if tree_depth > self.max_depth:
+                self.max_depth = tree_depth
+
+        if not root.children:
+            return None
+        best = max(root.children, key=lambda child: child.visits)
+        return best.move
+
+    def root_values(self):
+        """Visits and win rate of every root move, for reporting."""
+        return {child.move: (child.visits, child.wins / child.visits) for child in self.root.children}
+
+
+if __name__ == "__main__":
+    from engine import AIPlayer, Connect4
+
+    playouts = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    games = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    tree = MCTS(seed=0)
+    start = time.perf_counter()
+    tree.search(Position(), playouts)
+    elapsed = time.perf_counter() - start
+    print(f"{playouts} playouts from the empty board in {elapsed:.2f}s: "
+          f"{playouts / elapsed:,.0f} playouts/sec, {tree.plies / elapsed:,.0f} plies/sec")
+
+    # Strength against minimax, alternating who starts
+    results = {"mcts": 0, "minimax": 0, "draw": 0}
+    time_used = {"mcts": 0.0, "minimax": 0.0}
+    for index in range(games):
+        random.seed(index)
+        mcts_player = 1 if index % 2 == 0 else 2
+        players = {mcts_player: AIPlayer(mcts_player, "mcts", playouts=playouts),
+                   3 - mcts_player: AIPlayer(3 - mcts_player, "hard", depth=4)}
+        game = Connect4()
+        while not game.game_over:
+            ai = players[game.current_player]
+            stats = ai.search(game)
+            time_used["mcts" if ai.difficulty == "mcts" else "minimax"] += stats.elapsed
+            game.drop_piece(stats.move)
+        results["draw" if game.winner is None else "mcts" if game.winner == mcts_player else "minimax"] += 1
+    print(f"{games} games vs hard depth 4: {results}, "
+          f"time {time_used['mcts']:.1f}s (mcts) / {time_used['minimax']:.1f}s (minimax)")
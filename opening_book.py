@@ -0,0 +1,183 @@
+"""Opening book: precomputed best moves for the first plies of the game.
+
+The book is built offline by running the engine on every position reachable
+in the first ``ply`` moves and written as one sorted binary file:
+
+    header   magic "C4BK", version, rows, cols, key width, entry count
+    entries  key (little-endian, key width bytes), move (uint8), score (int16)
+
+Entries are keyed by Position.canonical_key(), so a position and its mirror
+image share one entry whose move is mirrored back on lookup, and sorted,
+so OpeningBook maps the file and binary searches it in place; opening a
+book only reads the header.
+
+    python opening_book.py --ply 4 --depth 8 -o opening_book.bin
+"""
+
+import argparse
+import mmap
+import os
+import struct
+import sys
+import time
+import warnings
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from bitboard import Position
+
+MAGIC = b"C4BK"
+VERSION = 2  # 2: canonical (mirror-folded) keys
+HEADER = struct.Struct("<4sHBBBI")  # magic, version, rows, cols, key width, count
+VALUE = struct.Struct("<Bh")  # best move, score for the side to move
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "opening_book.bin")
+
+
+def key_width(rows: int, cols: int) -> int:
+    """Bytes needed for a Position.key() on this board size."""
+    return ((rows + 1) * cols + 7) // 8
+
+
+class OpeningBook:
+    """Read-only, memory-mapped view of a book file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            self._file.close()
+            raise ValueError(f"{path} is not an opening book")
+        try:
+            magic, version, self.rows, self.cols, self.key_width, self.count = HEADER.unpack_from(self._map, 0)
+        except struct.error:  # shorter than a header
+            magic = version = None
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a version {VERSION} opening book")
+        self.entry_size = self.key_width + VALUE.size
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._file.close()
+            self._map = None
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _key_at(self, index: int) -> int:
+        offset = HEADER.size + index * self.entry_size
+        return int.from_bytes(self._map[offset:offset + self.key_width], "little")
+
+    def lookup(self, position: Position) -> Optional[Tuple[int, int]]:
+        """Return (best move, score) for a position, or None if not in the book."""
+        if self._map is None or (position.rows, position.cols) != (self.rows, self.cols):
+            return None
+        key, mirrored = position.canonical_key()
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key_at(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.count and self._key_at(lo) == key:
+            offset = HEADER.size + lo * self.entry_size + self.key_width
+            move, score = VALUE.unpack_from(self._map, offset)
+            return (self.cols - 1 - move if mirrored else move), score
+        return None
+
+
+def load_book(path: str = DEFAULT_PATH) -> Optional[OpeningBook]:
+    """Open a book if the file exists, else return None; a file in another
+    format or version (say, from an older release) is skipped with a warning,
+    as the AI plays without it."""
+    if not os.path.exists(path):
+        return None
+    try:
+        return OpeningBook(path)
+    except ValueError as e:
+        warnings.warn(f"{e}; playing without it")
+        return None
+
+
+def write_book(path: str, entries: Dict[int, Tuple[int, int]], rows: int = 6, cols: int = 7):
+    """Write key -> (move, score) entries as a sorted book file."""
+    width = key_width(rows, cols)
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, rows, cols, width, len(entries)))
+        for key in sorted(entries):
+            move, score = entries[key]
+            f.write(key.to_bytes(width, "little"))
+            f.write(VALUE.pack(move, max(-32768, min(32767, int(score)))))
+
+
+def book_positions(ply: int, rows: int = 6, cols: int = 7) -> Iterator[List[int]]:
+    """Move lists reaching every non-terminal position of at most ``ply``
+    moves, one per pair of mirror images."""
+    seen = set()
+    frontier = [[]]
+    for _ in range(ply + 1):
+        next_frontier = []
+        for moves in frontier:
+            position = Position(rows, cols)
+            for col in moves:
+                position.play(col)
+            key, _ = position.canonical_key()
+            if key in seen or position.game_over:
+                continue
+            seen.add(key)
+            yield moves
+            next_frontier.extend(moves + [col] for col in position.valid_moves())
+        frontier = next_frontier
+
+
+def _search(task) -> Tuple[int, int, int]:
+    """Worker: best move and score of one book position."""
+    from engine import AIPlayer, Connect4
+
+    moves, depth, rows, cols = task
+    game = Connect4(rows, cols)
+    for col in moves:
+        game.drop_piece(col)
+    ai = AIPlayer(game.current_player, "hard", depth=depth)
+    move = ai.minimax_move(game, game.get_valid_moves(), depth)
+    key, mirrored = game.position.canonical_key()
+    return key, (cols - 1 - move if mirrored else move), ai.last_score
+
+
+def generate(ply: int, depth: int, rows: int = 6, cols: int = 7,
+             workers: Optional[int] = None) -> Dict[int, Tuple[int, int]]:
+    """Search every book position at ``depth`` and return its entries."""
+    from concurrent.futures import ProcessPoolExecutor
+
+    tasks = [(moves, depth, rows, cols) for moves in book_positions(ply, rows, cols)]
+    entries = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for key, move, score in executor.map(_search, tasks, chunksize=8):
+            entries[key] = (move, score)
+    return entries
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build an opening book with the engine.")
+    parser.add_argument("--ply", type=int, default=4, help="book covers positions after up to this many moves")
+    parser.add_argument("--depth", type=int, default=8, help="search depth per position")
+    parser.add_argument("-o", "--output", default=DEFAULT_PATH)
+    parser.add_argument("-w", "--workers", type=int, default=None)
+    parser.add_argument("--rows", type=int, default=6)
+    parser.add_argument("--cols", type=int, default=7)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    entries = generate(args.ply, args.depth, args.rows, args.cols, args.workers)
+    write_book(args.output, entries, args.rows, args.cols)
+    print(f"{len(entries)} positions to ply {args.ply} at depth {args.depth} in "
+          f"{time.perf_counter() - start:.1f}s, {os.path.getsize(args.output)} bytes -> {args.output}",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
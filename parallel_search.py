@@ -0,0 +1,243 @@
+"""Fixed-depth minimax split across worker processes.
+
+The tree is expanded in the parent down to ``split_ply`` plies (1 = the root
+moves, 2 = every root move/reply pair, ...).  Each frontier position is then
+searched with a full window in a worker of a ProcessPoolExecutor, and the
+exact scores are backed up in the parent.  Since every subtree score is
+exact and ties are broken in valid_moves order, the chosen move is the same
+as AIPlayer.minimax_move at that depth with an empty transposition table.
+
+Workers rebuild the player from player_config, so the guarantee holds for
+any settings; check() compares the two searches' root scores with threat
+pruning, symmetry and move ordering switched off and with the learned
+evaluation and endgame table when their files exist.
+
+Run ``python parallel_search.py [depth] [workers]`` to compare against the
+serial search and run the check.
+"""
+
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+from bitboard import Position
+from endgame import EndgameTable
+from engine import AIPlayer, Connect4
+from evaluation import EvalPosition
+from ordering import MoveOrdering
+
+
+# Per worker process: endgame tables by path, mapped once
+_endgames: Dict[str, EndgameTable] = {}
+
+
+def player_config(ai: AIPlayer) -> Dict:
+    """The AIPlayer arguments that change a search's scores, to rebuild
+    the player in a worker; the endgame table goes by path, as its
+    mapping cannot be pickled."""
+    return {
+        "difficulty": ai.difficulty,
+        "depth": ai.depth,
+        "threat_pruning": ai.threat_pruning,
+        "symmetry": ai.symmetry,
+        "ordering": {name: getattr(ai.ordering, name) for name in MoveOrdering.HEURISTICS},
+        "evaluator": ai.evaluator,
+        "endgame": ai.endgame.path if ai.endgame is not None else None,
+    }
+
+
+def _search_subtree(task):
+    """Worker: exact minimax score of one frontier position."""
+    position, player_num, depth, maximizing, tt_size, config = task
+    config = dict(config)
+    path = config.pop("endgame")
+    if path is not None and path not in _endgames:
+        _endgames[path] = EndgameTable(path)
+    ai = AIPlayer(player_num, tt_size=tt_size, endgame=_endgames.get(path), **config)
+    start = time.perf_counter()
+    score = ai.minimax(EvalPosition.from_position(position), depth, -float('inf'), float('inf'), maximizing)
+    return score, ai.nodes_visited, os.getpid(), time.perf_counter() - start
+
+
+class ParallelStats:
+    """What one parallel search did, for reporting."""
+
+    def __init__(self):
+        self.worker_nodes: Dict[int, int] = {}
+        self.local_nodes = 0
+        self.tasks = 0
+        self.task_time = 0.0
+        self.wall_time = 0.0
+
+    @property
+    def nodes(self) -> int:
+        return self.local_nodes + sum(self.worker_nodes.values())
+
+    @property
+    def speedup(self) -> float:
+        """Time spent searching in workers over wall-clock time."""
+        return self.task_time / self.wall_time if self.wall_time else 0.0
+
+
+class ParallelSearch:
+    """Process pool that searches root subtrees for an AIPlayer."""
+
+    def __init__(self, workers: Optional[int] = None, split_ply: int = 1, tt_size: int = 1 << 16):
+        self.workers = workers or os.cpu_count() or 1
+        self.split_ply = split_ply
+        self.tt_size = tt_size
+        self.executor = None
+        self.stats = ParallelStats()
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def root_scores(self, ai: AIPlayer, position: Position, valid_moves: List[int], depth: int) -> Dict[int, float]:
+        """Return the exact depth-limited score of every root move."""
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        self.stats = stats = ParallelStats()
+        start = time.perf_counter()
+
+        # Expand the top of the tree; leaves are either scored here or
+        # become worker tasks whose index is kept in the plan
+        position = EvalPosition.from_position(position)
+        tasks = []
+
+        config = player_config(ai)
+
+        # The same steps as AIPlayer.minimax, down to the split ply
+        def expand(depth: int, maximizing: bool, ply: int):
+            stats.local_nodes += 1
+            if ai.endgame is not None and not position.game_over:
+                exact = ai.endgame_value(position)
+                if exact is not None:
+                    return exact
+            if depth == 0 or position.game_over:
+                return ai.evaluate_position(position)
+            if ply == self.split_ply:
+                tasks.append((position.copy(), ai.player_num, depth, maximizing, self.tt_size, config))
+                return len(tasks) - 1, None
+            decided, moves = ai.prune_moves(position, position.valid_moves())
+            if decided is not None:
+                return decided
+            if not moves:
+                return -float('inf') if maximizing else float('inf')
+            if depth == 1 and ai.evaluator is not None:
+                stats.local_nodes += len(moves)
+                scores = ai.evaluator.evaluate_children(position, moves, ai.player_num)
+                return max(scores) if maximizing else min(scores)
+            children = []
+            for col in moves:
+                position.play(col)
+                children.append(expand(depth - 1, not maximizing, ply + 1))
+                position.undo()
+            return maximizing, children
+
+        plan = {}
+        for col in valid_moves:
+            position.play(col)
+            plan[col] = expand(depth - 1, False, 1)
+            position.undo()
+
+        results = list(self.executor.map(_search_subtree, tasks))
+        for _, nodes, pid, elapsed in results:
+            stats.worker_nodes[pid] = stats.worker_nodes.get(pid, 0) + nodes
+            stats.task_time += elapsed
+        stats.tasks = len(tasks)
+
+        def back_up(node):
+            if not isinstance(node, tuple):
+                return node
+            head, children = node
+            if children is None:
+                return results[head][0]
+            values = [back_up(child) for child in children]
+            return max(values) if head else min(values)
+
+        scores = {col: back_up(node) for col, node in plan.items()}
+        stats.wall_time = time.perf_counter() - start
+        return scores
+
+
+def check(depth: int = 4, workers: int = 2, positions: int = 40, seed: int = 0) -> int:
+    """Compare parallel and serial root scores on random positions under
+    non-default settings; returns how many searches were compared and
+    raises AssertionError on a mismatch."""
+    from endgame import DEFAULT_PATH as ENDGAME_PATH
+    from learned_eval import DEFAULT_PATH as EVALUATOR_PATH
+
+    settings = [{"threat_pruning": False},
+                {"symmetry": False, "ordering": {"center": False, "history": False}}]
+    if os.path.exists(EVALUATOR_PATH):
+        settings.append({"evaluator": EVALUATOR_PATH, "threat_pruning": False})
+    if os.path.exists(ENDGAME_PATH):
+        settings.append({"endgame": ENDGAME_PATH})
+    rng = random.Random(seed)
+    compared = 0
+    for split_ply in (1, 2):
+        with ParallelSearch(workers, split_ply) as search:
+            for options in settings:
+                for _ in range(positions):
+                    game = Connect4()
+                    for _ in range(rng.randint(0, 34)):
+                        game.drop_piece(rng.choice(game.get_valid_moves()))
+                        if game.game_over:
+                            game.undo()
+                            break
+                    valid_moves = game.get_valid_moves()
+                    serial = AIPlayer(game.current_player, "hard", **options)
+                    serial.minimax_move(game, valid_moves, depth)
+                    parallel = AIPlayer(game.current_player, "hard", workers=workers, split_ply=split_ply, **options)
+                    parallel.parallel = search
+                    parallel.minimax_move(game, valid_moves, depth)
+                    assert serial.last_root_scores == parallel.last_root_scores, \
+                        f"{options} split {split_ply} moves {game.moves}: serial {serial.last_root_scores}, " \
+                        f"parallel {parallel.last_root_scores}"
+                    compared += 1
+    return compared
+
+
+if __name__ == "__main__":
+    depth = int(sys.argv[1]) if len(sys.argv) > 1 else 7
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count()
+    openings = [[], [3], [3, 3], [3, 3, 2, 4], [3, 2, 4, 3, 3, 3], [0, 6, 1, 5, 3, 3, 4, 2]]
+
+    for split_ply in (1, 2):
+        with ParallelSearch(workers, split_ply) as search:
+            for moves in openings:
+                game = Connect4()
+                for col in moves:
+                    game.drop_piece(col)
+                valid_moves = game.get_valid_moves()
+
+                serial = AIPlayer(game.current_player, "hard")
+                start = time.perf_counter()
+                serial_move = serial.minimax_move(game, valid_moves, depth)
+                serial_time = time.perf_counter() - start
+
+                parallel = AIPlayer(game.current_player, "hard", workers=workers, split_ply=split_ply)
+                parallel.parallel = search
+                parallel_move = parallel.minimax_move(game, valid_moves, depth)
+                stats = search.stats
+
+                print(f"split {split_ply} moves {moves}: serial {serial_move} in {serial_time:.2f}s, "
+                      f"parallel {parallel_move} in {stats.wall_time:.2f}s "
+                      f"({serial_time / stats.wall_time:.2f}x, {stats.tasks} tasks, {len(stats.worker_nodes)} workers)"
+                      + ("" if serial_move == parallel_move else "  MISMATCH"))
+
+    start = time.perf_counter()
+    compared = check(min(depth, 4), max(2, workers))
+    print(f"{compared} searches with non-default settings: parallel and serial root scores match "
+          f"({time.perf_counter() - start:.1f}s)")
@@ -0,0 +1,245 @@
+"""Perft: count every legal move sequence to a fixed depth.
+
+perft(depth) is the number of sequences of exactly ``depth`` moves from a
+position, where a sequence stops early (and does not count) once a move
+wins or fills the board before the last ply.  The count depends only on
+move generation and win detection, so it checks them apart from any
+search, and the time it takes measures their raw speed.
+
+It runs on several representations:
+
+* connect4: Connect4's get_valid_moves, drop_piece, check_win and undo;
+* position: bitboard.Position's valid_moves, play and undo;
+* bitboard: the same bitboards as plain integers in one function, counting
+  the last ply's moves without playing them;
+* numpy: a NumPy grid with its own move generation and a line-scanning win
+  check, sharing no code with the others, as a reference.
+
+All of them must give the same counts, and on the standard board the
+counts from the empty position must match REFERENCE.
+
+    python perft.py --depth 8
+    python perft.py --depth 6 --impl connect4 position --moves 3,3
+"""
+
+import argparse
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+from bitboard import Position, has_won
+from engine import Connect4
+
+# Move sequences of each length from the empty 7 x 6 board
+REFERENCE = {
+    0: 1,
+    1: 7,
+    2: 49,
+    3: 343,
+    4: 2401,
+    5: 16807,
+    6: 117649,
+    7: 823536,
+    8: 5673234,
+    9: 39394572,
+    10: 268031646,
+}
+
+
+def perft_connect4(game: Connect4, depth: int) -> int:
+    if depth == 0:
+        return 1
+    nodes = 0
+    for col in game.get_valid_moves():
+        game.drop_piece(col)
+        if depth == 1:
+            nodes += 1
+        elif not game.check_win(*game.last_move) and len(game.moves) < game.rows * game.cols:
+            nodes += perft_connect4(game, depth - 1)
+        game.undo()
+    return nodes
+
+
+def perft_position(position: Position, depth: int) -> int:
+    if depth == 0:
+        return 1
+    nodes = 0
+    for col in position.valid_moves():
+        position.play(col)
+        if depth == 1:
+            nodes += 1
+        elif not position.game_over:
+            nodes += perft_position(position, depth - 1)
+        position.undo()
+    return nodes
+
+
+def perft_bitboard(position: Position, depth: int) -> int:
+    geo = position.geometry
+    h1, top, size = geo.h1, geo.top, geo.size
+    cols = range(geo.cols)
+    heights = list(position.heights)
+
+    def count(current: int, other: int, stones: int, depth: int) -> int:
+        if depth == 1:
+            return sum(1 for col in cols if heights[col] < top[col])
+        nodes = 0
+        for col in cols:
+            bit = heights[col]
+            if bit < top[col]:
+                board = current | 1 << bit
+                if not has_won(board, h1) and stones + 1 < size:
+                    heights[col] = bit + 1
+                    nodes += count(other, board, stones + 1, depth - 1)
+                    heights[col] = bit
+        return nodes
+
+    if depth == 0:
+        return 1
+    current = position.boards[position.to_move - 1]
+    other = position.boards[2 - position.to_move]
+    return count(current, other, len(position.moves), depth)
+
+
+class GridBoard:
+    """Plain NumPy grid (row 0 is the top) for reference counts."""
+
+    def __init__(self, rows: int = 6, cols: int = 7):
+        import numpy as np
+
+        self.rows = rows
+        self.cols = cols
+        self.grid = np.zeros((rows, cols), dtype=np.int8)
+        self.filled = [0] * cols
+        self.to_move = 1
+        self.stones = 0
+
+    def valid_moves(self) -> List[int]:
+        return [col for col in range(self.cols) if self.filled[col] < self.rows]
+
+    def play(self, col: int) -> bool:
+        """Drop a piece and return whether it made four in a row."""
+        row = self.rows - 1 - self.filled[col]
+        player = self.to_move
+        self.grid[row, col] = player
+        self.filled[col] += 1
+        self.stones += 1
+        self.to_move = 3 - player
+        for dr, dc in ((0, 1), (1, 0), (1, 1), (1, -1)):
+            run = 1
+            for sign in (1, -1):
+                r, c = row + sign * dr, col + sign * dc
+                while 0 <= r < self.rows and 0 <= c < self.cols and self.grid[r, c] == player:
+                    run += 1
+                    r, c = r + sign * dr, c + sign * dc
+            if run >= 4:
+                return True
+        return False
+
+    def undo(self, col: int):
+        self.filled[col] -= 1
+        self.grid[self.rows - 1 - self.filled[col], col] = 0
+        self.stones -= 1
+        self.to_move = 3 - self.to_move
+
+
+def perft_grid(board: GridBoard, depth: int) -> int:
+    if depth == 0:
+        return 1
+    nodes = 0
+    for col in board.valid_moves():
+        won = board.play(col)
+        if depth == 1:
+            nodes += 1
+        elif not won and board.stones < board.rows * board.cols:
+            nodes += perft_grid(board, depth - 1)
+        board.undo(col)
+    return nodes
+
+
+def _setup(kind: str, moves: List[int], rows: int, cols: int):
+    if kind == "connect4":
+        state = Connect4(rows, cols)
+        for col in moves:
+            state.drop_piece(col)
+    elif kind == "numpy":
+        state = GridBoard(rows, cols)
+        for col in moves:
+            state.play(col)
+    else:
+        state = Position(rows, cols)
+        for col in moves:
+            state.play(col)
+    return state
+
+
+IMPLEMENTATIONS: Dict[str, Callable] = {
+    "connect4": perft_connect4,
+    "position": perft_position,
+    "bitboard": perft_bitboard,
+    "numpy": perft_grid,
+}
+
+
+def run(depth: int, kinds: List[str], moves: Optional[List[int]] = None, rows: int = 6,
+        cols: int = 7) -> Dict[str, Dict]:
+    """Perft with each implementation; returns nodes, seconds and nodes/sec."""
+    moves = moves or []
+    position = Position(rows, cols)
+    for col in moves:
+        if not position.can_play(col) or position.game_over:
+            raise ValueError(f"illegal move sequence {moves}")
+        position.play(col)
+    results = {}
+    for kind in kinds:
+        state = _setup(kind, moves, rows, cols)
+        start = time.perf_counter()
+        nodes = IMPLEMENTATIONS[kind](state, depth)
+        elapsed = time.perf_counter() - start
+        results[kind] = {"nodes": nodes, "seconds": elapsed, "nodes_per_sec": nodes / elapsed if elapsed else 0.0}
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Count move sequences to check and time move generation.")
+    parser.add_argument("--depth", type=int, default=7)
+    parser.add_argument("--impl", nargs="+", choices=sorted(IMPLEMENTATIONS), default=sorted(IMPLEMENTATIONS),
+                        help="implementations to run (default: all)")
+    parser.add_argument("--moves", default="", help="comma separated columns to start from")
+    parser.add_argument("--rows", type=int, default=6)
+    parser.add_argument("--cols", type=int, default=7)
+    parser.add_argument("--divide", action="store_true", help="also print the count below each first move")
+    args = parser.parse_args(argv)
+
+    moves = [int(col) for col in args.moves.split(",") if col.strip()]
+    standard = not moves and (args.rows, args.cols) == (6, 7)
+    failed = False
+    for depth in range(1, args.depth + 1):
+        results = run(depth, args.impl, moves, args.rows, args.cols)
+        counts = {result["nodes"] for result in results.values()}
+        reference = REFERENCE.get(depth) if standard else None
+        line = "  ".join(f"{kind} {result['nodes_per_sec']:>12,.0f}/s" for kind, result in results.items())
+        status = "ok"
+        if len(counts) > 1:
+            status = "MISMATCH " + ", ".join(f"{kind}={result['nodes']}" for kind, result in results.items())
+        elif reference is not None and counts != {reference}:
+            status = f"MISMATCH reference {reference}"
+        failed |= status != "ok"
+        print(f"depth {depth:2d}: {min(counts):>12,}  {line}  {status}")
+
+    if args.divide:
+        position = _setup("position", moves, args.rows, args.cols)
+        for col in position.valid_moves():
+            position.play(col)
+            if args.depth == 1:
+                count = 1
+            else:
+                count = 0 if position.game_over else perft_position(position, args.depth - 1)
+            position.undo()
+            print(f"  {col}: {count}")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""Saved games: a text and a packed binary record format, and a streaming
+analyzer that replays records through the engine.
+
+Text records hold one game per line as its columns numbered from 1 (digits,
+then letters past 9), optionally prefixed by the board size when it is not
+7 x 6; anything after the moves is ignored, so solver test files read too:
+
+    4453
+    9x7:55446
+
+Binary records start with a header (magic "C4GR", version) followed by one
+entry per game: rows, cols, move count (``<BBH``) and the columns packed
+two per byte, low nibble first.
+
+Readers are generators, so files of any size are processed one game at a
+time.
+
+    python records.py generate 1000 -o games.c4r
+    python records.py convert games.c4r games.txt
+    python records.py analyze games.c4r --depth 4 -o analysis.jsonl
+"""
+
+import argparse
+import json
+import random
+import struct
+import sys
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from engine import AIPlayer, Connect4
+
+MAGIC = b"C4GR"
+VERSION = 1
+HEADER = struct.Struct("<4sH")  # magic, version
+ENTRY = struct.Struct("<BBH")  # rows, cols, move count
+BINARY_SUFFIX = ".c4r"
+
+DIGITS = "123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+
+class GameRecord:
+    """The moves of one game on a given board size."""
+
+    __slots__ = ("rows", "cols", "moves")
+
+    def __init__(self, moves: List[int], rows: int = 6, cols: int = 7):
+        self.rows = rows
+        self.cols = cols
+        self.moves = moves
+
+    @classmethod
+    def from_game(cls, game: Connect4) -> "GameRecord":
+        return cls(game.moves, game.rows, game.cols)
+
+    @classmethod
+    def from_text(cls, line: str) -> "GameRecord":
+        text = line.split()[0]
+        rows, cols = 6, 7
+        if ":" in text:
+            size, text = text.split(":")
+            cols, rows = (int(n) for n in size.lower().split("x"))
+        return cls([DIGITS.index(char.upper()) for char in text], rows, cols)
+
+    def to_text(self) -> str:
+        moves = "".join(DIGITS[col] for col in self.moves)
+        if (self.rows, self.cols) == (6, 7):
+            return moves
+        return f"{self.cols}x{self.rows}:{moves}"
+
+    def pack(self) -> bytes:
+        moves = self.moves + [0] * (len(self.moves) % 2)
+        packed = bytes(moves[i] | moves[i + 1] << 4 for i in range(0, len(moves), 2))
+        return ENTRY.pack(self.rows, self.cols, len(self.moves)) + packed
+
+    def replay(self) -> Connect4:
+        """The finished game; raises ValueError on an illegal move."""
+        game = Connect4(self.rows, self.cols)
+        for ply, col in enumerate(self.moves):
+            if game.game_over or not game.drop_piece(col):
+                raise ValueError(f"illegal move {col} at ply {ply} in {self.to_text()}")
+        return game
+
+
+def read_text(path: str) -> Iterator[GameRecord]:
+    with open(path) as f:
+        for line in f:
+            if line.strip() and not line.startswith("#"):
+                yield GameRecord.from_text(line)
+
+
+def read_binary(path: str) -> Iterator[GameRecord]:
+    with open(path, "rb") as f:
+        magic, version = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} game record file")
+        while True:
+            entry = f.read(ENTRY.size)
+            if not entry:
+                return
+            rows, cols, count = ENTRY.unpack(entry)
+            packed = f.read((count + 1) // 2)
+            moves = []
+            for byte in packed:
+                moves.append(byte & 15)
+                moves.append(byte >> 4)
+            yield GameRecord(moves[:count], rows, cols)
+
+
+def read_records(path: str) -> Iterator[GameRecord]:
+    """Games from a text or binary record file, told apart by the header."""
+    with open(path, "rb") as f:
+        binary = f.read(len(MAGIC)) == MAGIC
+    return read_binary(path) if binary else read_text(path)
+
+
+def write_records(path: str, records: Iterable[GameRecord]) -> int:
+    """Write records as binary if ``path`` ends in .c4r, else as text.
+
+    Returns the number of games written.
+    """
+    count = 0
+    if path.endswith(BINARY_SUFFIX):
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION))
+            for record in records:
+                f.write(record.pack())
+                count += 1
+    else:
+        with open(path, "w") as f:
+            for record in records:
+                f.write(record.to_text() + "\n")
+                count += 1
+    return count
+
+
+def analyze(records: Iterable[GameRecord], depth: int = 4,
+            time_budget_ms: Optional[int] = None) -> Iterator[Dict]:
+    """Replay every game and score each move with the hard AI.
+
+    Yields one dict per move with the searched score of the move played,
+    the engine's preferred move and score, and the difference between the
+    two (0 when the move played was as good as the engine's choice).
+    """
+    for index, record in enumerate(records):
+        game = Connect4(record.rows, record.cols)
+        # One player per side, so the table carries over between moves
+        players = {player: AIPlayer(player, "hard", depth=depth) for player in (1, 2)}
+        for ply, col in enumerate(record.moves):
+            if game.game_over or not game.is_valid_move(col):
+                raise ValueError(f"game {index}: illegal move {col} at ply {ply}")
+            stats = players[game.current_player].search(game, time_budget_ms)
+            scores = stats.root_scores
+            yield {
+                "game": index,
+                "ply": ply,
+                "player": game.current_player,
+                "move": col,
+                "score": scores[col],
+                "best_move": stats.move,
+                "best_score": scores[stats.move],
+                "loss": scores[stats.move] - scores[col],
+                "depth": stats.depth,
+            }
+            game.drop_piece(col)
+
+
+def generate(games: int, difficulty: str = "medium", rows: int = 6, cols: int = 7,
+             seed: int = 0) -> Iterator[GameRecord]:
+    """Self-play games between two AIPlayers of one difficulty."""
+    random.seed(seed)
+    for _ in range(games):
+        game = Connect4(rows, cols)
+        players = {player: AIPlayer(player, difficulty) for player in (1, 2)}
+        while not game.game_over:
+            game.drop_piece(players[game.current_player].get_move(game))
+        yield GameRecord.from_game(game)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert, generate and analyze game records.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    convert = commands.add_parser("convert", help="rewrite records as text or binary (.c4r)")
+    convert.add_argument("input")
+    convert.add_argument("output")
+
+    gen = commands.add_parser("generate", help="write self-play games")
+    gen.add_argument("games", type=int)
+    gen.add_argument("-o", "--output", required=True)
+    gen.add_argument("--difficulty", default="medium")
+    gen.add_argument("--rows", type=int, default=6)
+    gen.add_argument("--cols", type=int, default=7)
+    gen.add_argument("--seed", type=int, default=0)
+
+    anal = commands.add_parser("analyze", help="score every move as JSON lines")
+    anal.add_argument("input")
+    anal.add_argument("--depth", type=int, default=4)
+    anal.add_argument("--time-budget-ms", type=int, default=None)
+    anal.add_argument("-o", "--output", default="-")
+    args = parser.parse_args(argv)
+
+    if args.command == "convert":
+        count = write_records(args.output, read_records(args.input))
+        print(f"{count} games -> {args.output}", file=sys.stderr)
+    elif args.command == "generate":
+        records = generate(args.games, args.difficulty, args.rows, args.cols, args.seed)
+        count = write_records(args.output, records)
+        print(f"{count} games -> {args.output}", file=sys.stderr)
+    else:
+        output = sys.stdout if args.output == "-" else open(args.output, "w")
+        try:
+            for row in analyze(read_records(args.input), args.depth, args.time_budget_ms):
+                output.write(json.dumps(row) + "\n")
+        finally:
+            if output is not sys.stdout:
+                output.close()
+
+
+if __name__ == "__main__":
+    main()
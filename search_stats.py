@@ -0,0 +1,195 @@
+"""Structured statistics for every AI move.
+
+AIPlayer.search returns a SearchStats for the move it picked and passes it
+to each of the player's hooks, callables taking the stats object:
+
+    ai = AIPlayer(2, "hard", hooks=[print_stats, JsonlStatsWriter("moves.jsonl")])
+
+Hooks run in whichever thread called search, which in the GUI is the AI's
+worker thread.  profile_move runs a single move under cProfile.
+
+    python search_stats.py --moves 3,3,2 --depth 7
+    python search_stats.py --moves 3 --time-budget-ms 500 --profile move.prof
+"""
+
+import json
+import sys
+from typing import Dict, Optional
+
+
+class SearchStats:
+    """What one call to AIPlayer.search did."""
+
+    def __init__(self, player: int, difficulty: str):
+        self.player = player
+        self.difficulty = difficulty
+        self.move = None
+        # How the move was found: random, heuristic, ponder, book, search,
+        # solver, endgame or mcts
+        self.source = None
+        self.score = None
+        self.outcome = None  # exact result when solved, e.g. "win in 7 plies"
+        self.depth = 0
+        self.nodes = 0
+        self.elapsed = 0.0
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+        self.tt_hits = 0
+        self.tt_misses = 0
+        self.tt_collisions = 0
+        # Root column -> score of the last finished depth / seconds spent
+        # in its subtree over all depths
+        self.root_scores: Dict[int, float] = {}
+        self.root_times: Dict[int, float] = {}
+        self.parallel = None  # ParallelStats when the search used worker processes
+        # MCTS only: playouts run for this move and those inherited from
+        # the previous move's tree
+        self.playouts = 0
+        self.reused_playouts = 0
+
+    @property
+    def nodes_per_sec(self) -> float:
+        return self.nodes / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def playouts_per_sec(self) -> float:
+        return self.playouts / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def branching_factor(self) -> float:
+        """Effective branching factor, nodes ** (1 / depth)."""
+        return self.nodes ** (1 / self.depth) if self.depth and self.nodes else 0.0
+
+    @property
+    def tt_hit_rate(self) -> float:
+        probes = self.tt_hits + self.tt_misses
+        return self.tt_hits / probes if probes else 0.0
+
+    @property
+    def first_move_cutoff_rate(self) -> float:
+        return self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.0
+
+    def as_dict(self) -> Dict:
+        record = {
+            "player": self.player,
+            "difficulty": self.difficulty,
+            "move": self.move,
+            "source": self.source,
+            "score": self.score,
+            "outcome": self.outcome,
+            "depth": self.depth,
+            "nodes": self.nodes,
+            "elapsed_ms": round(self.elapsed * 1000, 3),
+            "nodes_per_sec": round(self.nodes_per_sec),
+            "branching_factor": round(self.branching_factor, 3),
+            "cutoffs": self.cutoffs,
+            "first_move_cutoff_rate": round(self.first_move_cutoff_rate, 4),
+            "tt_hits": self.tt_hits,
+            "tt_misses": self.tt_misses,
+            "tt_collisions": self.tt_collisions,
+            "tt_hit_rate": round(self.tt_hit_rate, 4),
+            "root_scores": {str(col): score for col, score in self.root_scores.items()},
+            "root_time_ms": {str(col): round(t * 1000, 3) for col, t in self.root_times.items()},
+        }
+        if self.playouts:
+            record["playouts"] = self.playouts
+            record["playouts_per_sec"] = round(self.playouts_per_sec)
+            record["reused_playouts"] = self.reused_playouts
+        if self.parallel is not None:
+            record["parallel"] = {
+                "tasks": self.parallel.tasks,
+                "worker_nodes": {str(pid): nodes for pid, nodes in self.parallel.worker_nodes.items()},
+                "speedup": round(self.parallel.speedup, 3),
+            }
+        return record
+
+    def summary(self) -> str:
+        """One line for people, in place of the search's old console output."""
+        text = f"AI {self.player} ({self.difficulty}) chose column {self.move} [{self.source}]"
+        if self.outcome is not None:
+            text += f": {self.outcome}"
+        elif self.score is not None:
+            text += f" with score {self.score}"
+        if self.playouts:
+            text += (f", {self.playouts} playouts in {self.elapsed * 1000:.0f} ms "
+                     f"({self.playouts_per_sec:,.0f}/s, {self.reused_playouts} reused), tree depth {self.depth}")
+        elif self.nodes:
+            text += (f", depth {self.depth}, {self.nodes} nodes in {self.elapsed * 1000:.0f} ms "
+                     f"({self.nodes_per_sec:,.0f}/s), TT hit rate {self.tt_hit_rate:.1%}, "
+                     f"first-move cutoffs {self.first_move_cutoff_rate:.1%}")
+        return text
+
+
+def print_stats(stats: SearchStats):
+    """Hook that prints the summary line of each move."""
+    print(stats.summary())
+
+
+class JsonlStatsWriter:
+    """Hook that appends every move's stats to a JSON Lines file."""
+
+    def __init__(self, output):
+        self._owned = isinstance(output, str)
+        self.output = open(output, "a") if self._owned else output
+
+    def __call__(self, stats: SearchStats):
+        self.output.write(json.dumps(stats.as_dict()) + "\n")
+        self.output.flush()
+
+    def close(self):
+        if self._owned:
+            self.output.close()
+
+
+def profile_move(ai, game, time_budget_ms: Optional[int] = None, output: Optional[str] = None,
+                 sort: str = "cumulative", limit: int = 25) -> SearchStats:
+    """Run one ai.search under cProfile.
+
+    The profile is dumped to ``output`` (for pstats or snakeviz) if given,
+    otherwise its top ``limit`` entries are printed to stderr.
+    """
+    import cProfile
+    import pstats
+
+    profiler = cProfile.Profile()
+    stats = profiler.runcall(ai.search, game, time_budget_ms)
+    if output is not None:
+        profiler.dump_stats(output)
+    else:
+        pstats.Stats(profiler, stream=sys.stderr).sort_stats(sort).print_stats(limit)
+    return stats
+
+
+def main(argv=None):
+    import argparse
+    from engine import AIPlayer, Connect4
+
+    parser = argparse.ArgumentParser(description="Search one position and report the move's stats.")
+    parser.add_argument("--moves", default="", help="comma separated columns played so far")
+    parser.add_argument("--difficulty", default="hard")
+    parser.add_argument("--depth", type=int, default=4)
+    parser.add_argument("--time-budget-ms", type=int, default=None)
+    parser.add_argument("--rows", type=int, default=6)
+    parser.add_argument("--cols", type=int, default=7)
+    parser.add_argument("--jsonl", help="append the stats to this JSONL file")
+    parser.add_argument("--profile", nargs="?", const="-", metavar="FILE",
+                        help="profile the move; dump to FILE or print the top entries")
+    args = parser.parse_args(argv)
+
+    game = Connect4(args.rows, args.cols)
+    for col in filter(None, args.moves.split(",")):
+        game.drop_piece(int(col))
+    hooks = [print_stats]
+    if args.jsonl:
+        hooks.append(JsonlStatsWriter(args.jsonl))
+    ai = AIPlayer(game.current_player, args.difficulty, depth=args.depth, hooks=hooks)
+    if args.profile:
+        profile_move(ai, game, args.time_budget_ms, None if args.profile == "-" else args.profile)
+    else:
+        ai.search(game, args.time_budget_ms)
+    for hook in hooks[1:]:
+        hook.close()
+
+
+if __name__ == "__main__":
+    main()
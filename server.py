@@ -0,0 +1,358 @@
+"""Headless asyncio server hosting many Connect 4 games against the AI.
+
+Clients talk newline-delimited JSON over TCP (or a Unix socket).  Each
+request is one object with an "op" and gets exactly one reply:
+
+    {"op": "new", "difficulty": "hard", "depth": 4, "ai_first": false}
+    {"op": "move", "session": 1, "col": 3}       human move, then the AI's
+    {"op": "state", "session": 1}
+    {"op": "close", "session": 1}
+    {"op": "metrics"}
+
+Replies carry "ok" and, for game ops, the session's moves, valid moves,
+winner and whether the game is over; failures carry "error".
+
+A session is a bitboard Position plus its AI settings.  AI moves run in a
+bounded ProcessPoolExecutor; at most ``max_pending`` may be queued or
+running at once; beyond that a move is refused with "overloaded" rather
+than queued, and one that takes longer than its deadline is answered with
+"deadline exceeded".  Every AI move runs under a time budget, the
+session's own or one that stops a search without one (a "perfect" solve,
+say) well before the deadline, so no worker stays busy for long after a
+client has been told its move failed.  Metrics cover sessions, queue depth and AI move
+latency percentiles.
+
+    python server.py --port 8765 --workers 4
+    python loadgen.py --port 8765 --clients 200
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Tuple
+
+from bitboard import Position
+from engine import AIPlayer, Connect4
+
+DIFFICULTIES = ("easy", "medium", "hard", "perfect", "mcts")
+# AIPlayer arguments a client may set, with their upper limits
+OPTION_LIMITS = {"depth": 8, "playouts": 20000}
+MAX_TIME_BUDGET_MS = 10000
+
+
+# Per worker process: one AIPlayer per player and settings, shared by every
+# session, since building one (mostly its transposition table) costs more
+# than a medium move and table entries are valid whichever game they came from
+_players: Dict[Tuple, AIPlayer] = {}
+
+
+def _ai_move(position: Position, difficulty: str, options: Dict, time_budget_ms: Optional[int],
+             time_limit_ms: int):
+    """Worker: the AI's move for a session's position, stopped by the
+    search itself at the time limit when the session has no budget."""
+    game = Connect4(position.rows, position.cols)
+    for col in position.moves:
+        game.drop_piece(col)
+    key = (position.to_move, difficulty, tuple(sorted(options.items())))
+    ai = _players.get(key)
+    if ai is None:
+        ai = _players[key] = AIPlayer(position.to_move, difficulty, **options)
+    stats = ai.search(game, time_budget_ms, time_limit_ms)
+    return stats.move, stats.nodes
+
+
+def _warm_up():
+    time.sleep(0.05)  # keep this worker busy so each call starts another
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))]
+
+
+def is_int(value) -> bool:
+    """A JSON integer: bools are ints in Python but not here."""
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+class RequestError(Exception):
+    """A request that is answered with an error instead of a result."""
+
+
+class Session:
+    __slots__ = ("id", "position", "difficulty", "options", "time_budget_ms", "last_active", "busy")
+
+    def __init__(self, session_id: int, position: Position, difficulty: str, options: Dict,
+                 time_budget_ms: Optional[int]):
+        self.id = session_id
+        self.position = position
+        self.difficulty = difficulty
+        self.options = options
+        self.time_budget_ms = time_budget_ms
+        self.last_active = time.monotonic()
+        self.busy = False  # an AI move is being computed
+
+    def state(self) -> Dict:
+        position = self.position
+        return {
+            "ok": True,
+            "session": self.id,
+            "moves": position.moves,
+            "valid_moves": [] if position.game_over else position.valid_moves(),
+            "to_move": position.to_move,
+            "winner": position.winner,
+            "game_over": position.game_over,
+        }
+
+
+class GameServer:
+    """Sessions, the AI worker pool and the metrics behind the protocol."""
+
+    def __init__(self, workers: Optional[int] = None, max_pending: int = 256, deadline_ms: int = 5000,
+                 max_sessions: int = 100000, idle_timeout: float = 600.0):
+        self.workers = workers or os.cpu_count() or 1
+        # Spawned, not forked: workers start on demand and a forked one would
+        # hold copies of the sockets open at the time, so closed connections
+        # would never see EOF
+        self.executor = ProcessPoolExecutor(self.workers, multiprocessing.get_context("spawn"))
+        self.max_pending = max_pending
+        self.deadline_ms = deadline_ms
+        # Searches without a budget of their own stop by themselves after
+        # this long, leaving time to reply before the deadline
+        self.time_limit_ms = max(1, min(MAX_TIME_BUDGET_MS, deadline_ms * 4 // 5))
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.sessions: Dict[int, Session] = {}
+        self._ids = itertools.count(1)
+        self.pending = 0  # AI moves queued or running in the pool
+        self.connections = 0
+        self.counters = {"sessions_created": 0, "moves": 0, "ai_moves": 0, "overloaded": 0,
+                         "deadline_exceeded": 0, "errors": 0, "internal_errors": 0}
+        self.latencies = deque(maxlen=10000)  # recent AI move latencies, seconds
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _restart_pool(self):
+        broken = self.executor
+        self.executor = ProcessPoolExecutor(self.workers, multiprocessing.get_context("spawn"))
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def metrics(self) -> Dict:
+        latencies = list(self.latencies)
+        return {
+            "ok": True,
+            "sessions": len(self.sessions),
+            "connections": self.connections,
+            "queue_depth": self.pending,
+            "workers": self.workers,
+            **self.counters,
+            "ai_latency_ms": {name: round(percentile(latencies, q) * 1000, 3)
+                              for name, q in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99))},
+        }
+
+    def _session(self, request: Dict) -> Session:
+        session_id = request.get("session")
+        session = self.sessions.get(session_id) if is_int(session_id) else None
+        if session is None:
+            raise RequestError("unknown session")
+        session.last_active = time.monotonic()
+        return session
+
+    async def dispatch(self, request: Dict) -> Dict:
+        op = request.get("op")
+        if op == "new":
+            return await self.new_session(request)
+        if op == "move":
+            return await self.move(self._session(request), request.get("col"))
+        if op == "state":
+            return self._session(request).state()
+        if op == "close":
+            self.sessions.pop(self._session(request).id, None)
+            return {"ok": True}
+        if op == "metrics":
+            return self.metrics()
+        raise RequestError(f"unknown op {op!r}")
+
+    async def new_session(self, request: Dict) -> Dict:
+        if len(self.sessions) >= self.max_sessions:
+            raise RequestError("too many sessions")
+        difficulty = request.get("difficulty", "medium")
+        if difficulty not in DIFFICULTIES:
+            raise RequestError(f"unknown difficulty {difficulty!r}")
+        options = {}
+        for name, limit in OPTION_LIMITS.items():
+            if name in request:
+                value = request[name]
+                if not is_int(value) or not 1 <= value <= limit:
+                    raise RequestError(f"{name} must be an integer from 1 to {limit}")
+                options[name] = value
+        time_budget_ms = request.get("time_budget_ms")
+        if time_budget_ms is not None and not (is_int(time_budget_ms)
+                                               and 1 <= time_budget_ms <= MAX_TIME_BUDGET_MS):
+            raise RequestError(f"time_budget_ms must be an integer from 1 to {MAX_TIME_BUDGET_MS}")
+        rows, cols = request.get("rows", 6), request.get("cols", 7)
+        if not (is_int(rows) and is_int(cols) and 4 <= rows <= 10 and 4 <= cols <= 12):
+            raise RequestError("unsupported board size")
+
+        session = Session(next(self._ids), Position(rows, cols), difficulty, options, time_budget_ms)
+        self.sessions[session.id] = session
+        self.counters["sessions_created"] += 1
+        if request.get("ai_first"):
+            try:
+                await self.ai_move(session)
+            except Exception:
+                del self.sessions[session.id]
+                raise
+        return session.state()
+
+    async def move(self, session: Session, col) -> Dict:
+        if session.busy:
+            raise RequestError("AI move in progress")
+        position = session.position
+        if position.game_over:
+            raise RequestError("game over")
+        if not is_int(col) or not position.can_play(col):
+            raise RequestError("illegal move")
+        position.play(col)
+        self.counters["moves"] += 1
+        if not position.game_over:
+            try:
+                await self.ai_move(session)
+            except Exception:
+                position.undo()  # let the client retry the move
+                raise
+        return session.state()
+
+    async def ai_move(self, session: Session):
+        if self.pending >= self.max_pending:
+            self.counters["overloaded"] += 1
+            raise RequestError("overloaded")
+        loop = asyncio.get_running_loop()
+        deadline = self.deadline_ms / 1000
+        if session.time_budget_ms is not None:
+            deadline = max(deadline, 2 * session.time_budget_ms / 1000)
+        self.pending += 1
+        session.busy = True
+        start = time.perf_counter()
+        executor = self.executor
+        future = loop.run_in_executor(executor, _ai_move, session.position, session.difficulty,
+                                      session.options, session.time_budget_ms, self.time_limit_ms)
+        # A move past its deadline still holds its worker until the search
+        # ends, so it counts against the queue until then
+        future.add_done_callback(self._job_done)
+        try:
+            col, _ = await asyncio.wait_for(asyncio.shield(future), deadline)
+        except asyncio.TimeoutError:
+            self.counters["deadline_exceeded"] += 1
+            raise RequestError("deadline exceeded")
+        except BrokenProcessPool:
+            # A worker died; later moves get a fresh pool
+            if self.executor is executor:
+                self._restart_pool()
+            raise
+        finally:
+            session.busy = False
+        self.latencies.append(time.perf_counter() - start)
+        self.counters["ai_moves"] += 1
+        session.position.play(col)
+
+    def _job_done(self, future: asyncio.Future):
+        self.pending -= 1
+        if not future.cancelled():
+            future.exception()  # retrieved, so an abandoned failure is not logged
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                request = None
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise RequestError("request must be a JSON object")
+                    response = await self.dispatch(request)
+                except (RequestError, ValueError) as e:
+                    self.counters["errors"] += 1
+                    response = {"ok": False, "error": str(e)}
+                except Exception:
+                    # A bug or a failed worker: answer and keep the connection
+                    self.counters["internal_errors"] += 1
+                    traceback.print_exc(file=sys.stderr)
+                    response = {"ok": False, "error": "internal error"}
+                if isinstance(request, dict) and "id" in request:
+                    response["id"] = request["id"]
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()  # stop reading while the client is not reading
+        except ConnectionError:
+            pass
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    async def reap_idle_sessions(self):
+        while True:
+            await asyncio.sleep(min(60.0, self.idle_timeout))
+            cutoff = time.monotonic() - self.idle_timeout
+            for session_id in [s.id for s in self.sessions.values() if s.last_active < cutoff and not s.busy]:
+                del self.sessions[session_id]
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8765, unix: Optional[str] = None):
+        """Start listening; returns the asyncio Server."""
+        if unix:
+            server = await asyncio.start_unix_server(self.handle_connection, unix)
+        else:
+            server = await asyncio.start_server(self.handle_connection, host, port, backlog=1024)
+        self._reaper = asyncio.ensure_future(self.reap_idle_sessions())
+        # Start every worker now rather than on the first moves, which would
+        # otherwise pay for the process start and imports
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.executor, _warm_up) for _ in range(self.workers)))
+        return server
+
+
+async def serve(args):
+    game_server = GameServer(args.workers, args.max_pending, args.deadline_ms, idle_timeout=args.idle_timeout)
+    server = await game_server.start(args.host, args.port, args.unix)
+    where = args.unix or f"{args.host}:{args.port}"
+    print(f"serving on {where} with {game_server.workers} AI workers", flush=True)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        game_server.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve Connect 4 games against the AI over JSON lines.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="listen on this Unix socket path instead")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="AI processes (default: all cores)")
+    parser.add_argument("--max-pending", type=int, default=256, help="AI moves queued or running before refusing")
+    parser.add_argument("--deadline-ms", type=int, default=5000, help="per AI move deadline")
+    parser.add_argument("--idle-timeout", type=float, default=600.0, help="drop sessions idle this many seconds")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""Exact Connect 4 solver used by the "perfect" difficulty.
+
+Negamax with alpha-beta on raw bitboards, following the usual solver
+scheme:
+
+* a win scores ``(size + 1 - stones_before_winning_move) // 2`` for the
+  winner, so faster wins score higher; a draw scores 0;
+* the score of a position is bounded by the number of moves left, which
+  tightens the alpha-beta window before any child is searched;
+* moves that hand the opponent an immediate win are never generated, and
+  a double threat is a loss without further search;
+* children are ordered by how many winning cells they create;
+* the root is solved with null-window searches that bisect the score
+  range (MTD-style), each of them cheap thanks to the transposition table.
+
+Run ``python solver.py`` to benchmark generated early/middle/end game sets,
+or pass files of ``<moves> <score>`` lines (columns numbered from 1) to
+time and check published test positions.
+"""
+
+import random
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+from bitboard import Position, popcount
+from ordering import center_order
+from threats import winning_cells
+from transposition import TranspositionTable, LOWER, UPPER
+
+
+class SolverTimeout(Exception):
+    """Raised when a solve runs past its deadline or is asked to stop."""
+
+
+class Solver:
+    """Computes exact game-theoretic scores of positions."""
+
+    def __init__(self, tt_size: int = 1 << 20, stop_event=None):
+        self.tt = TranspositionTable(tt_size)
+        self.nodes = 0
+        self._deadline = None
+        # Optional threading.Event; setting it aborts the current solve
+        self.stop_event = stop_event
+
+    def solve(self, position: Position, deadline: Optional[float] = None) -> int:
+        """Exact score of a non-terminal position for the side to move.
+
+        Positive: the side to move wins, ``score_to_plies`` tells how fast;
+        zero: draw; negative: the side to move loses.
+        """
+        geo = position.geometry
+        current = position.boards[position.to_move - 1]
+        mask = position.mask
+        moves = len(position.moves)
+        self._deadline = deadline
+        self._geo = geo
+        self._columns = [((1 << geo.rows) - 1) << geo.bottom[col] for col in center_order(geo.cols)]
+
+        possible = (mask + geo.bottom_mask) & geo.board_mask
+        if winning_cells(current, mask, geo) & possible:
+            return (geo.size + 1 - moves) // 2
+
+        low = -((geo.size - moves) // 2)
+        high = (geo.size + 1 - moves) // 2
+        while low < high:
+            med = low + (high - low) // 2
+            if med <= 0 and int(low / 2) < med:
+                med = int(low / 2)
+            elif med >= 0 and int(high / 2) > med:
+                med = int(high / 2)
+            score = self._negamax(current, mask, moves, med, med + 1)
+            if score <= med:
+                high = score
+            else:
+                low = score
+        return low
+
+    def analyze(self, position: Position, deadline: Optional[float] = None) -> Dict[int, int]:
+        """Exact score of every legal move, from the mover's point of view."""
+        scores = {}
+        for col in position.valid_moves():
+            position.play(col)
+            if position.winner is not None:
+                scores[col] = (position.geometry.size + 2 - len(position.moves)) // 2
+            elif position.game_over:
+                scores[col] = 0
+            else:
+                scores[col] = -self.solve(position, deadline)
+            position.undo()
+        return scores
+
+    def _negamax(self, current: int, mask: int, moves: int, alpha: int, beta: int) -> int:
+        # The side to move cannot win with its next stone (checked by the caller)
+        self.nodes += 1
+        if not self.nodes & 4095 and ((self._deadline is not None and time.perf_counter() > self._deadline)
+                                      or (self.stop_event is not None and self.stop_event.is_set())):
+            raise SolverTimeout()
+        geo = self._geo
+        size = geo.size
+
+        possible = (mask + geo.bottom_mask) & geo.board_mask
+        opponent = current ^ mask
+        opponent_wins = winning_cells(opponent, mask, geo)
+        forced = possible & opponent_wins
+        if forced:
+            if forced & (forced - 1):
+                return -((size - moves) // 2)  # two threats to block: lost
+            possible = forced
+        non_losing = possible & ~(opponent_wins >> 1)
+        if not non_losing:
+            return -((size - moves) // 2)
+        if moves >= size - 2:
+            return 0
+
+        low = -((size - 2 - moves) // 2)  # opponent cannot win right away
+        high = (size - 1 - moves) // 2  # we cannot win right away either
+        key = current + mask
+        entry = self.tt.probe(key)
+        if entry is not None:
+            if entry[2] == UPPER:
+                high = min(high, entry[0])
+            else:
+                low = max(low, entry[0])
+        if low >= beta:
+            return low
+        if high <= alpha:
+            return high
+        alpha = max(alpha, low)
+        beta = min(beta, high)
+
+        # Order by how many winning cells each move creates, center first on ties
+        ordered = []
+        for column in self._columns:
+            move = non_losing & column
+            if move:
+                ordered.append((-popcount(winning_cells(current | move, mask, geo)), len(ordered), move))
+        ordered.sort()
+
+        for _, _, move in ordered:
+            score = -self._negamax(opponent, mask | move, moves + 1, -beta, -alpha)
+            if score >= beta:
+                self.tt.store(key, score, 0, LOWER, None)
+                return score
+            if score > alpha:
+                alpha = score
+        self.tt.store(key, alpha, 0, UPPER, None)
+        return alpha
+
+
+def score_to_plies(score: int, moves: int, size: int = 42) -> Optional[int]:
+    """Plies from a position with ``moves`` stones until the game is decided.
+
+    Counts the winning stone itself; returns None for a draw.
+    """
+    if score == 0:
+        return None
+    # Stones on the board before the winning one; the winner's stones go
+    # in on the mover's parity for a win and the other parity for a loss
+    before = size + 1 - 2 * abs(score)
+    parity = moves % 2 if score > 0 else (moves + 1) % 2
+    if before % 2 != parity:
+        before -= 1
+    return before - moves + 1
+
+
+def describe(score: int, moves: int, size: int = 42) -> str:
+    if score == 0:
+        return "draw"
+    plies = score_to_plies(score, moves, size)
+    return f"{'win' if score > 0 else 'loss'} in {plies} plies"
+
+
+def random_positions(count: int, min_moves: int, max_moves: int, seed: int = 0,
+                     rows: int = 6, cols: int = 7) -> List[Position]:
+    """Non-terminal positions from random play with min..max stones."""
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        target = rng.randint(min_moves, max_moves)
+        position = Position(rows, cols)
+        while len(position.moves) < target and not position.game_over:
+            position.play(rng.choice(position.valid_moves()))
+        if not position.game_over:
+            positions.append(position)
+    return positions
+
+
+def read_test_file(path: str) -> List[Tuple[Position, int]]:
+    """Positions and expected scores from ``<moves> <score>`` lines."""
+    cases = []
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            moves, score = line.split()
+            position = Position()
+            for char in moves:
+                position.play(int(char) - 1)
+            cases.append((position, int(score)))
+    return cases
+
+
+def benchmark(name: str, cases: List[Tuple[Position, Optional[int]]]):
+    total_time = total_nodes = wrong = 0
+    for position, expected in cases:
+        solver = Solver()
+        start = time.perf_counter()
+        score = solver.solve(position)
+        total_time += time.perf_counter() - start
+        total_nodes += solver.nodes
+        if expected is not None and score != expected:
+            wrong += 1
+    n = len(cases)
+    check = f", {wrong} wrong" if any(expected is not None for _, expected in cases) else ""
+    print(f"{name:12s} {n:4d} positions  mean {total_time / n * 1000:9.1f} ms  "
+          f"{total_nodes / n:11.0f} nodes  {total_nodes / total_time:9.0f} nodes/sec{check}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        for path in sys.argv[1:]:
+            benchmark(path, read_test_file(path))
+    else:
+        sets = [("end", 28, 36), ("middle", 20, 27), ("early", 14, 19)]
+        for name, low, high in sets:
+            benchmark(name, [(p, None) for p in random_positions(20, low, high, seed=len(name))])
@@ -1,307 +1,51 @@
+import queue
+import threading
+import traceback
 import tkinter as tk
-from tkinter import messagebox, ttk
-import numpy as np
-import random
-import time
-from typing import List, Tuple, Optional
+from tkinter import messagebox
 
-class Connect4:
-    def __init__(self, rows=6, cols=7): #init is a contructor .. ya3ni bybtdy m3 el code 
-        self.rows = rows
-        self.cols = cols
-        self.board = np.zeros((rows, cols), dtype=int)
-        self.current_player = 1
-        self.game_over = False
-        self.winner = None
-        self.last_move = None
-
-    def reset(self): # function rest NPM model that works to find relationships
-        self.board = np.zeros((self.rows, self.cols), dtype=int)
-        self.current_player = 1
-        self.game_over = False
-        self.winner = None
-        self.last_move = None
-
-    def drop_piece(self, col: int) -> bool:
-        """Attempt to drop a piece in the specified column.
-        Returns True if successful, False if column is full."""
-        if col < 0 or col >= self.cols:
-            return False
-            
-        for row in range(self.rows-1, -1, -1):
-            if self.board[row][col] == 0:
-                self.board[row][col] = self.current_player
-                self.last_move = (row, col)
-                
-                if self.check_win(row, col):
-                    self.game_over = True
-                    self.winner = self.current_player
-                elif np.all(self.board != 0):
-                    self.game_over = True
-                
-                self.current_player = 3 - self.current_player
-                return True
-        return False
-
-    def check_win(self, row: int, col: int) -> bool:
-        """Check if the last move resulted in a win."""
-        player = self.board[row][col]
-        
-        # Check horizontal
-        count = 1
-        c = col - 1
-        while c >= 0 and self.board[row][c] == player:
-            count += 1
-            c -= 1
-        c = col + 1
-        while c < self.cols and self.board[row][c] == player:
-            count += 1
-            c += 1
-        if count >= 4:
-            return True
-        
-        # Check vertical
-        count = 1
-        r = row + 1
-        while r < self.rows and self.board[r][col] == player:
-            count += 1
-            r += 1
-        if count >= 4:
-            return True
-        
-        # Check diagonal (top-left to bottom-right)
-        count = 1
-        r, c = row - 1, col - 1
-        while r >= 0 and c >= 0 and self.board[r][c] == player:
-            count += 1
-            r -= 1
-            c -= 1
-        r, c = row + 1, col + 1
-        while r < self.rows and c < self.cols and self.board[r][c] == player:
-            count += 1
-            r += 1
-            c += 1
-        if count >= 4:
-            return True
-        
-        # Check diagonal (top-right to bottom-left)
-        count = 1
-        r, c = row - 1, col + 1
-        while r >= 0 and c < self.cols and self.board[r][c] == player:
-            count += 1
-            r -= 1
-            c += 1
-        r, c = row + 1, col - 1
-        while r < self.rows and c >= 0 and self.board[r][c] == player:
-            count += 1
-            r += 1
-            c -= 1
-        if count >= 4:
-            return True
-        
-        return False
-
-    def get_valid_moves(self) -> List[int]:
-        """Returns a list of valid column indices where a piece can be dropped."""
-        return [col for col in range(self.cols) if self.board[0][col] == 0]
-
-    def is_valid_move(self, col: int) -> bool:
-        """Check if a move is valid."""
-        return col in self.get_valid_moves()
-
-    def print_board(self):
-        """Print the board to the terminal."""
-        print("\n" + "-" * (self.cols * 4 + 1))
-        for row in self.board:
-            print("|", end="")
-            for cell in row:
-                print(f" {' ' if cell == 0 else 'X' if cell == 1 else 'O'} |", end="")
-            print("\n" + "-" * (self.cols * 4 + 1))
-        print(f"Current Player: {self.current_player} ({'X' if self.current_player == 1 else 'O'})")
-        if self.last_move:
-            print(f"Last move: row {self.last_move[0]}, col {self.last_move[1]}")
-
-
-class AIPlayer:
-    def __init__(self, player_num: int, difficulty: str = "medium"):
-        self.player_num = player_num
-        self.difficulty = difficulty
-        self.nodes_visited = 0
-        
-    def get_move(self, game: Connect4) -> int:
-        """Get the AI's move based on the current game state."""
-        valid_moves = game.get_valid_moves()
-        self.nodes_visited = 0
-        
-        if self.difficulty == "easy":
-            return random.choice(valid_moves)
-        elif self.difficulty == "medium":
-            return self.medium_ai_move(game, valid_moves)
-        else:  # hard
-            return self.minimax_move(game, valid_moves)
-    
-    def medium_ai_move(self, game: Connect4, valid_moves: List[int]) -> int:
-        # Check for immediate win
-        for col in valid_moves:
-            temp_game = Connect4(game.rows, game.cols)
-            temp_game.board = np.copy(game.board)
-            temp_game.current_player = game.current_player
-            if temp_game.drop_piece(col) and temp_game.winner == self.player_num:
-                return col
-        
-        # Check if opponent can win next move and block
-        opponent = 3 - self.player_num
-        for col in valid_moves:
-            temp_game = Connect4(game.rows, game.cols)
-            temp_game.board = np.copy(game.board)
-            temp_game.current_player = opponent
-            if temp_game.drop_piece(col) and temp_game.winner == opponent:
-                return col
-        
-        # Otherwise, choose randomly but prefer center columns
-        weights = [1, 2, 3, 4, 3, 2, 1]
-        weighted_moves = []
-        for col in valid_moves:
-            weighted_moves.extend([col] * weights[col])
-        return random.choice(weighted_moves)
-    
-    def minimax_move(self, game: Connect4, valid_moves: List[int], depth: int = 4) -> int:
-        """Use minimax algorithm with alpha-beta pruning to determine best move."""  ## minmax with alphabeta
-        best_score = -float('inf')
-        best_move = random.choice(valid_moves)
-        
-        print(f"\nAI {self.player_num} ({self.difficulty}) is thinking...")
-        print(f"Valid moves: {valid_moves}")
-        
-        for col in valid_moves:
-            temp_game = Connect4(game.rows, game.cols)
-            temp_game.board = np.copy(game.board)
-            temp_game.current_player = game.current_player
-            temp_game.drop_piece(col)
-            
-            score = self.minimax(temp_game, depth-1, -float('inf'), float('inf'), False)
-            print(f"Column {col} score: {score}")
-            
-            if score > best_score:
-                best_score = score
-                best_move = col
-        
-        print(f"AI chose column {best_move} with score {best_score}")
-        print(f"Nodes visited: {self.nodes_visited}")
-        return best_move
-    
-    def minimax(self, game: Connect4, depth: int, alpha: float, beta: float, maximizing_player: bool) -> float:
-        """Minimax algorithm with alpha-beta pruning."""
-        self.nodes_visited += 1
-        
-        if depth == 0 or game.game_over:
-            return self.evaluate_board(game)
-        
-        valid_moves = game.get_valid_moves()
-        
-        if maximizing_player:
-            value = -float('inf')
-            for col in valid_moves:
-                temp_game = Connect4(game.rows, game.cols)
-                temp_game.board = np.copy(game.board)
-                temp_game.current_player = game.current_player
-                temp_game.drop_piece(col)
-                
-                value = max(value, self.minimax(temp_game, depth-1, alpha, beta, False))
-                alpha = max(alpha, value)
-                if alpha >= beta:
-                    break
-            return value
-        else:
-            value = float('inf')
-            for col in valid_moves:
-                temp_game = Connect4(game.rows, game.cols)
-                temp_game.board = np.copy(game.board)
-                temp_game.current_player = 3 - game.current_player
-                temp_game.drop_piece(col)
-                
-                value = min(value, self.minimax(temp_game, depth-1, alpha, beta, True))
-                beta = min(beta, value)
-                if alpha >= beta:
-                    break
-            return value
-    
-    def evaluate_board(self, game: Connect4) -> float:
-        """Evaluate the board position for the AI player."""
-        if game.winner == self.player_num:
-            return 1000
-        elif game.winner == 3 - self.player_num:
-            return -1000
-        elif game.game_over:
-            return 0
-        
-        score = 0
-        center_col = game.cols // 2
-        center_array = [game.board[row][center_col] for row in range(game.rows)]
-        center_count = center_array.count(self.player_num)
-        score += center_count * 3
-        
-        # Evaluate horizontal opportunities
-        for row in range(game.rows):
-            for col in range(game.cols - 3):
-                window = game.board[row, col:col+4]
-                score += self.evaluate_window(window)
-        
-        # Evaluate vertical opportunities
-        for col in range(game.cols):
-            for row in range(game.rows - 3):
-                window = [game.board[row+i][col] for i in range(4)]
-                score += self.evaluate_window(window)
-        
-        # Evaluate diagonal (top-left to bottom-right) opportunities
-        for row in range(game.rows - 3):
-            for col in range(game.cols - 3):
-                window = [game.board[row+i][col+i] for i in range(4)]
-                score += self.evaluate_window(window)
-        
-        # Evaluate diagonal (top-right to bottom-left) opportunities
-        for row in range(game.rows - 3):
-            for col in range(3, game.cols):
-                window = [game.board[row+i][col-i] for i in range(4)]
-                score += self.evaluate_window(window)
-        
-        return score
-    
-    def evaluate_window(self, window: List[int]) -> float:
-        """Evaluate a window of 4 positions for potential."""
-        score = 0
-        opponent = 3 - self.player_num
-        
-        if list(window).count(self.player_num) == 4:
-            score += 100
-        elif list(window).count(self.player_num) == 3 and list(window).count(0) == 1:
-            score += 5
-        elif list(window).count(self.player_num) == 2 and list(window).count(0) == 2:
-            score += 2
-        
-        if list(window).count(opponent) == 3 and list(window).count(0) == 1:
-            score -= 4
-        
-        return score
+from engine import Connect4, AIPlayer, HumanPlayer, SearchTimeout
+from endgame import load_endgame
+from opening_book import load_book
+from search_stats import print_stats
 
-
-class HumanPlayer:
-    def __init__(self, player_num: int):
-        self.player_num = player_num
+# Menu label -> (rows, cols)
+BOARD_SIZES = {"7 x 6": (6, 7), "8 x 7": (7, 8), "9 x 7": (7, 9), "10 x 8": (8, 10)}
 
 
 class Connect4GUI:
-    def __init__(self, root):
+    # Largest board area in pixels; cells shrink to fit bigger boards
+    max_board_width = 700
+    max_board_height = 600
+    
+    def __init__(self, root, echo_board: bool = False, rows: int = 6, cols: int = 7):
         self.root = root
         self.root.title("Connect 4")
         
         # Game variables
         self.game = None
+        self.rows = rows
+        self.cols = cols
         self.player1 = None
         self.player2 = None
         self.ai_thinking = False
         self.scores = {1: 0, 2: 0, "draw": 0}
         
+        # AI searches run in a worker thread; moves come back through this
+        # queue tagged with the search id, so results of a cancelled search
+        # are recognised and dropped
+        self.ai_queue = queue.Queue()
+        self.search_id = 0
+        self.searching_ai = None
+        self.search_thread = None
+        self.ai_after_id = None
+        
+        # In Human vs AI the AI searches the human's replies while the
+        # human thinks (see AIPlayer.ponder)
+        self.pondering_enabled = True
+        self.ponder_thread = None
+        self.pondering_ai = None
+        
         # Colors
         self.bg_color = "#3498db"
         self.board_color = "#2980b9"
@@ -310,11 +54,23 @@ class Connect4GUI:
         self.player2_color = "#f1c40f"  # Yellow
         self.highlight_color = "#2ecc71"
         
+        # Also print the board and each AI move's search stats to the terminal
+        self.echo_board = echo_board
+        self.ai_hooks = [print_stats] if echo_board else []
+        
+        # Thinking time per move for the hard AI
+        self.ai_time_budget_ms = 1000
+        # Built with opening_book.py; the hard AI plays without it if missing
+        self.opening_book = load_book()
+        # Built with endgame.py; likewise optional
+        self.endgame = load_endgame()
+        
         # Setup main menu
         self.setup_main_menu()
         
     def setup_main_menu(self):
         """Create the main menu screen."""
+        self.cancel_ai_move()
         self.clear_window()
         
         # Main container frame
@@ -342,12 +98,31 @@ class Connect4GUI:
                           bd=3, padx=10, pady=5)
             btn.pack(pady=10)
         
+        # Board size
+        size_frame = tk.Frame(main_frame, bg=self.bg_color)
+        size_frame.pack(pady=10)
+        tk.Label(size_frame, text="Board size:", font=("Arial", 12), 
+                fg="white", bg=self.bg_color).pack(side=tk.LEFT, padx=5)
+        self.board_size = tk.StringVar(value=f"{self.cols} x {self.rows}")
+        sizes = list(BOARD_SIZES)
+        if self.board_size.get() not in BOARD_SIZES:
+            sizes.append(self.board_size.get())
+        size_menu = tk.OptionMenu(size_frame, self.board_size, *sizes, command=self.set_board_size)
+        size_menu.config(font=("Arial", 12), bg=self.board_color, fg="white", 
+                        activebackground=self.board_color, highlightthickness=0)
+        size_menu.pack(side=tk.LEFT, padx=5)
+        
         # Exit button
         exit_button = tk.Button(main_frame, text="Exit", font=("Arial", 12), 
                                command=self.root.quit, bg="#e74c3c", fg="white", 
                                relief=tk.RAISED, bd=3, padx=10, pady=5)
         exit_button.pack(pady=20)
     
+    def set_board_size(self, label: str):
+        """Use the board size picked in the main menu for the next games."""
+        if label in BOARD_SIZES:
+            self.rows, self.cols = BOARD_SIZES[label]
+    
     def setup_human_vs_human(self):
         """Setup for Human vs Human game."""
         self.player1 = HumanPlayer(1)
@@ -373,7 +148,7 @@ class Connect4GUI:
         tk.Label(difficulty_frame, text="Select AI Difficulty:", 
                 font=("Arial", 14), fg="white", bg=self.bg_color).pack()
         
-        difficulties = [("Easy", "easy"), ("Medium", "medium"), ("Hard", "hard")]
+        difficulties = [("Easy", "easy"), ("Medium", "medium"), ("Hard", "hard"), ("Perfect", "perfect"), ("MCTS", "mcts")]
         self.ai_difficulty = tk.StringVar(value="medium")
         
         for text, mode in difficulties:
@@ -401,7 +176,7 @@ class Connect4GUI:
     def start_human_vs_ai(self):
         """Start Human vs AI game with selected difficulty."""
         self.player1 = HumanPlayer(1)
-        self.player2 = AIPlayer(2, self.ai_difficulty.get())
+        self.player2 = AIPlayer(2, self.ai_difficulty.get(), book=self.opening_book, endgame=self.endgame, hooks=self.ai_hooks)
         self.start_game()
     
     def setup_ai_vs_ai(self):
@@ -423,7 +198,7 @@ class Connect4GUI:
         tk.Label(ai1_frame, text="AI Player 1 Difficulty:", 
                 font=("Arial", 14), fg="white", bg=self.bg_color).pack()
         
-        difficulties = [("Easy", "easy"), ("Medium", "medium"), ("Hard", "hard")]
+        difficulties = [("Easy", "easy"), ("Medium", "medium"), ("Hard", "hard"), ("Perfect", "perfect"), ("MCTS", "mcts")]
         self.ai1_difficulty = tk.StringVar(value="medium")
         
         for text, mode in difficulties:
@@ -465,15 +240,16 @@ class Connect4GUI:
     
     def start_ai_vs_ai(self):
         """Start AI vs AI game with selected difficulties."""
-        self.player1 = AIPlayer(1, self.ai1_difficulty.get())
-        self.player2 = AIPlayer(2, self.ai2_difficulty.get())
+        self.player1 = AIPlayer(1, self.ai1_difficulty.get(), book=self.opening_book, endgame=self.endgame, hooks=self.ai_hooks)
+        self.player2 = AIPlayer(2, self.ai2_difficulty.get(), book=self.opening_book, endgame=self.endgame, hooks=self.ai_hooks)
         self.start_game()
         self.ai_move()  # Start the AI moves
     
     def start_game(self):
         """Initialize and display the game board."""
         self.clear_window()
-        self.game = Connect4()
+        self.game = Connect4(self.rows, self.cols)
+        self.cell_size = min(100, self.max_board_width // self.cols, self.max_board_height // self.rows)
         
         # Main game frame
         game_frame = tk.Frame(self.root, bg=self.bg_color)
@@ -493,10 +269,12 @@ class Connect4GUI:
                 font=("Arial", 12), fg=self.player2_color, bg=self.bg_color).pack(side=tk.LEFT, padx=10)
         
         # Create game board UI
-        self.canvas = tk.Canvas(game_frame, width=700, height=600, bg=self.board_color, highlightthickness=0)
+        self.canvas = tk.Canvas(game_frame, width=self.cols * self.cell_size, height=self.rows * self.cell_size, 
+                              bg=self.board_color, highlightthickness=0)
         self.canvas.pack(pady=(0, 20))
         
         # Draw the board
+        self.create_board_items()
         self.draw_board()
         
         # Add column click handlers for human players
@@ -525,43 +303,86 @@ class Connect4GUI:
                                   relief=tk.RAISED, bd=3, padx=10, pady=5)
         new_game_button.pack(side=tk.LEFT, padx=10)
         
+        # Undo/redo buttons, for games with a human player
+        if isinstance(self.player1, HumanPlayer) or isinstance(self.player2, HumanPlayer):
+            for text, command in (("Undo", self.undo_move), ("Redo", self.redo_move)):
+                tk.Button(control_frame, text=text, font=("Arial", 12), command=command, 
+                         bg="#95a5a6", fg="white", relief=tk.RAISED, bd=3, padx=10, 
+                         pady=5).pack(side=tk.LEFT, padx=5)
+        
+        # Thinking indicator, filled in while an AI searches
+        self.thinking_label = tk.Label(control_frame, text="", font=("Arial", 11), 
+                                      fg="white", bg=self.bg_color)
+        self.thinking_label.pack(side=tk.LEFT, padx=10)
+        
         # If it's AI's turn first, make the move
         if isinstance(self.player1, AIPlayer) and self.game.current_player == 1:
             self.ai_move()
     
-    def draw_board(self):
-        """Draw the Connect 4 board on the canvas."""
+    def create_board_items(self):
+        """Create the canvas items for every cell and the status line once.
+        
+        draw_board then only recolors what changed, found by comparing the
+        position's bitboards with the ones last drawn."""
         self.canvas.delete("all")
-        cell_width = 100
-        cell_height = 100
-        padding = 5
+        cell_width = self.cell_size
+        cell_height = self.cell_size
+        padding = max(2, self.cell_size // 20)
         
-        # Draw slots
+        geometry = self.game.position.geometry
+        self.cell_items = {}  # bit index -> oval item id
         for row in range(self.game.rows):
             for col in range(self.game.cols):
                 x1 = col * cell_width + padding
                 y1 = row * cell_height + padding
                 x2 = (col + 1) * cell_width - padding
                 y2 = (row + 1) * cell_height - padding
-                
-                # Determine color based on board state
-                if self.game.board[row][col] == 1:
-                    color = self.player1_color
-                elif self.game.board[row][col] == 2:
-                    color = self.player2_color
+                self.cell_items[geometry.bit(row, col)] = self.canvas.create_oval(
+                    x1, y1, x2, y2, fill=self.empty_color, outline=self.board_color, width=2)
+        
+        self.status_item = self.canvas.create_text(self.game.cols * cell_width // 2, self.game.rows * cell_height - 20, text="", font=("Arial", 12, "bold"), fill="white")
+        self.drawn_boards = (0, 0)
+        self.highlighted_item = None
+    
+    def draw_board(self):
+        """Update the cells that changed since the last draw, the last-move
+        highlight and the current player text."""
+        geometry = self.game.position.geometry
+        colors = (self.player1_color, self.player2_color)
+        boards = tuple(self.game.position.boards)
+        
+        for player in (0, 1):
+            changed = boards[player] ^ self.drawn_boards[player]
+            while changed:
+                low = changed & -changed
+                changed ^= low
+                if boards[player] & low:
+                    color = colors[player]
+                elif boards[1 - player] & low:
+                    continue  # recolored by the other player's pass
                 else:
                     color = self.empty_color
-                
-                # Highlight last move
-                outline = self.highlight_color if self.game.last_move and self.game.last_move == (row, col) else self.board_color
-                self.canvas.create_oval(x1, y1, x2, y2, fill=color, outline=outline, width=2)
+                self.canvas.itemconfig(self.cell_items[low.bit_length() - 1], fill=color)
+        self.drawn_boards = boards
+        
+        # Highlight last move
+        last_item = None
+        if self.game.last_move:
+            last_item = self.cell_items[geometry.bit(*self.game.last_move)]
+        if last_item != self.highlighted_item:
+            if self.highlighted_item is not None:
+                self.canvas.itemconfig(self.highlighted_item, outline=self.board_color)
+            if last_item is not None:
+                self.canvas.itemconfig(last_item, outline=self.highlight_color)
+            self.highlighted_item = last_item
         
         # Show current player
         current_player_text = f"Current Turn: {'Player 1 (Red)' if self.game.current_player == 1 else 'Player 2 (Yellow)'}"
-        self.canvas.create_text(350, 580, text=current_player_text, font=("Arial", 12, "bold"), fill="white")
+        self.canvas.itemconfig(self.status_item, text=current_player_text)
         
         # Print board to terminal
-        self.game.print_board()
+        if self.echo_board:
+            self.game.print_board()
     
     def handle_click(self, event):
         """Handle mouse clicks on the game board."""
@@ -570,12 +391,13 @@ class Connect4GUI:
             
         if (isinstance(self.player1, HumanPlayer) and self.game.current_player == 1) or \
            (isinstance(self.player2, HumanPlayer) and self.game.current_player == 2):
-            col = event.x // 100
+            col = event.x // self.cell_size
             self.make_move(col)
     
     def make_move(self, col: int):
         """Attempt to make a move in the specified column."""
         if self.game.is_valid_move(col):
+            self.stop_pondering()
             self.game.drop_piece(col)
             self.draw_board()
             
@@ -595,11 +417,63 @@ class Connect4GUI:
         # For AI vs AI, add a longer delay so humans can follow
         delay = 1000 if isinstance(self.player1, AIPlayer) and isinstance(self.player2, AIPlayer) else 500
         
-        self.root.after(delay, lambda: self.execute_ai_move(current_player))
+        self.ai_after_id = self.root.after(delay, lambda: self.execute_ai_move(current_player))
     
     def execute_ai_move(self, ai_player):
-        """Execute the AI's move after the delay."""
-        col = ai_player.get_move(self.game)
+        """Start the AI's search in a worker thread after the delay."""
+        self.ai_after_id = None
+        self.search_id += 1
+        self.searching_ai = ai_player
+        ai_player.stop_event.clear()
+        
+        # The worker searches a snapshot, never the game being displayed
+        self.search_thread = threading.Thread(target=self.search_worker,
+                                              args=(ai_player, self.game.copy(), self.search_id), daemon=True)
+        self.search_thread.start()
+        self.poll_ai_move()
+    
+    def search_worker(self, ai_player, game, search_id):
+        """Runs in the worker thread: search and post the move."""
+        col = None
+        try:
+            col = ai_player.get_move(game, self.ai_time_budget_ms)
+        except SearchTimeout:
+            pass
+        except Exception:
+            traceback.print_exc()
+        finally:
+            # Always answer, or poll_ai_move would wait forever
+            self.ai_queue.put((search_id, col))
+    
+    def poll_ai_move(self):
+        """Check for the worker's move; show search progress meanwhile."""
+        while True:
+            try:
+                search_id, col = self.ai_queue.get_nowait()
+            except queue.Empty:
+                break
+            if search_id == self.search_id:
+                # Cancelled searches bump search_id, so None here is a failure
+                if col is None:
+                    self.fail_ai_move()
+                else:
+                    self.finish_ai_move(col)
+                return
+        
+        if self.searching_ai is None:
+            return
+        ai_player = self.searching_ai
+        depth = f"depth {ai_player.depth_reached}, " if ai_player.depth_reached else ""
+        self.thinking_label.config(text=f"AI {ai_player.player_num} thinking... "
+                                        f"{depth}{ai_player.nodes_visited:,} nodes")
+        self.ai_after_id = self.root.after(50, self.poll_ai_move)
+    
+    def finish_ai_move(self, col: int):
+        """Play the move the worker found."""
+        self.searching_ai = None
+        self.search_thread = None
+        self.ai_after_id = None
+        self.thinking_label.config(text="")
         self.game.drop_piece(col)
         self.draw_board()
         self.ai_thinking = False
@@ -608,6 +482,49 @@ class Connect4GUI:
             self.show_game_result()
         elif isinstance(self.player1 if self.game.current_player == 1 else self.player2, AIPlayer):
             self.ai_move()
+        elif self.pondering_enabled:
+            self.start_pondering(self.player1 if isinstance(self.player1, AIPlayer) else self.player2)
+    
+    def fail_ai_move(self):
+        """Give up on a search that raised; the traceback is on stderr."""
+        self.searching_ai = None
+        self.search_thread = None
+        self.ai_after_id = None
+        self.ai_thinking = False
+        self.thinking_label.config(text="")
+        messagebox.showerror("AI Error", "The AI failed to find a move. Start a new game to continue.")
+    
+    def start_pondering(self, ai_player):
+        """Let the AI search the human's possible replies in the background."""
+        ai_player.stop_event.clear()
+        self.pondering_ai = ai_player
+        self.ponder_thread = threading.Thread(target=ai_player.ponder, args=(self.game.copy(),), daemon=True)
+        self.ponder_thread.start()
+    
+    def stop_pondering(self):
+        """Stop background pondering and wait for the thread to finish."""
+        if self.ponder_thread is not None:
+            self.pondering_ai.cancel()
+            self.ponder_thread.join()
+            self.ponder_thread = None
+            self.pondering_ai = None
+    
+    def cancel_ai_move(self):
+        """Stop any pending or running AI search; its move will be ignored."""
+        self.stop_pondering()
+        if self.ai_after_id is not None:
+            self.root.after_cancel(self.ai_after_id)
+            self.ai_after_id = None
+        if self.searching_ai is not None:
+            self.searching_ai.cancel()
+            self.searching_ai = None
+        # Wait for the search to stop: the next one clears the same
+        # player's stop_event and must not run alongside it
+        if self.search_thread is not None:
+            self.search_thread.join()
+            self.search_thread = None
+        self.search_id += 1
+        self.ai_thinking = False
     
     def show_game_result(self):
         """Show a message box with the game result and update scores."""
@@ -637,8 +554,32 @@ class Connect4GUI:
     def restart_game(self):
         """Restart the game with the same players but reset the board."""
         if self.game:
+            self.cancel_ai_move()
+            self.thinking_label.config(text="")
             self.game.reset()
             self.draw_board()
+            if isinstance(self.player1, AIPlayer):
+                self.ai_move()
+    
+    def is_ai_turn(self) -> bool:
+        return isinstance(self.player1 if self.game.current_player == 1 else self.player2, AIPlayer)
+    
+    def undo_move(self):
+        """Take back moves until it is a human player's turn again."""
+        self.cancel_ai_move()
+        self.thinking_label.config(text="")
+        while self.game.undo() is not None and self.is_ai_turn():
+            pass
+        self.draw_board()
+    
+    def redo_move(self):
+        """Replay taken back moves up to the human player's next turn."""
+        self.cancel_ai_move()
+        while self.game.redo() is not None and self.is_ai_turn() and self.game.redo_moves:
+            pass
+        self.draw_board()
+        if self.is_ai_turn() and not self.game.game_over:
+            self.ai_move()
     
     def clear_window(self):
         """Clear all widgets from the window."""
@@ -646,7 +587,54 @@ class Connect4GUI:
             widget.destroy()
 
 
+def benchmark_redraw(root, games=20, seed=0, rows=6, cols=7):
+    """Mean milliseconds per move to redraw the board, incrementally and by
+    rebuilding every canvas item as the GUI used to."""
+    import random
+    import time
+    
+    app = Connect4GUI(root, rows=rows, cols=cols)
+    app.player1 = HumanPlayer(1)
+    app.player2 = HumanPlayer(2)
+    app.start_game()
+    results = {}
+    for label, redraw in (("incremental", app.draw_board),
+                          ("full", lambda: (app.create_board_items(), app.draw_board()))):
+        rng = random.Random(seed)
+        total = moves = 0
+        for _ in range(games):
+            app.game.reset()
+            redraw()
+            while not app.game.game_over:
+                app.game.drop_piece(rng.choice(app.game.get_valid_moves()))
+                start = time.perf_counter()
+                redraw()
+                root.update_idletasks()
+                total += time.perf_counter() - start
+                moves += 1
+        results[label] = total / moves * 1000
+        print(f"{label:12s} {results[label]:.3f} ms per move over {moves} moves")
+    return results
+
+
 if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Connect 4")
+    parser.add_argument("--echo", action="store_true", help="print the board and the AI's search stats after every move")
+    parser.add_argument("--rows", type=int, default=6)
+    parser.add_argument("--cols", type=int, default=7)
+    parser.add_argument("--bench-redraw", type=int, metavar="GAMES",
+                        help="time board redraws over random games and exit")
+    args = parser.parse_args()
+    
+    if args.bench_redraw:
+        root = tk.Tk()
+        root.withdraw()
+        benchmark_redraw(root, args.bench_redraw, rows=args.rows, cols=args.cols)
+        root.destroy()
+        raise SystemExit
+    
     root = tk.Tk()
     root.geometry("800x800")
     root.configure(bg="#3498db")
@@ -661,5 +649,5 @@ if __name__ == "__main__":
     center_y = int(screen_height/2 - window_height/2)
     root.geometry(f'{window_width}x{window_height}+{center_x}+{center_y}')
     
-    app = Connect4GUI(root)
+    app = Connect4GUI(root, echo_board=args.echo, rows=args.rows, cols=args.cols)
     root.mainloop()
\ No newline at end of file
@@ -0,0 +1,53 @@
+"""A small generated endgame table against the solver and plain negamax."""
+
+import warnings
+
+import pytest
+
+from endgame import EndgameTable, _negamax, build, check, load_endgame, random_seeds, write_table
+from solver import Solver
+
+MAX_EMPTY = 9
+SEEDS = 30
+
+
+@pytest.fixture(scope="module")
+def table(tmp_path_factory):
+    entries = build(random_seeds(SEEDS, MAX_EMPTY), MAX_EMPTY)
+    path = str(tmp_path_factory.mktemp("endgame") / "endgame.bin")
+    write_table(path, entries, MAX_EMPTY)
+    table = EndgameTable(path)
+    yield table
+    table.close()
+
+
+def test_seeds_match_negamax_and_solver(table):
+    solver = Solver()
+    for position in random_seeds(SEEDS, MAX_EMPTY):
+        score = table.lookup(position)
+        assert score == _negamax(position.copy())
+        assert score == solver.solve(position)
+        assert table.analyze(position) == solver.analyze(position)
+
+
+def test_subtree_positions_match(table):
+    assert check(table, random_seeds(SEEDS, MAX_EMPTY), samples=SEEDS) == SEEDS
+
+
+def test_positions_outside_the_table_are_not_found(table):
+    position = next(random_seeds(1, MAX_EMPTY + 2, seed=1))
+    assert table.lookup(position) is None
+    assert table.analyze(position) is None
+
+
+def test_load_endgame_skips_an_unreadable_file_with_a_warning(table, tmp_path):
+    with open(table.path, "rb") as f:
+        good = f.read()
+    stale = b"C4EG\x00\x00" + good[6:]
+    for data in (b"", b"C4EG", stale, good[:len(good) // 2], good[:6] + bytes(len(good) - 6)):
+        path = tmp_path / "endgame.bin"
+        path.write_bytes(data)
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            assert load_endgame(str(path)) is None
+        assert "playing without it" in str(caught[0].message)
@@ -0,0 +1,69 @@
+"""Mirror folding in the transposition table and the opening book."""
+
+import random
+import warnings
+
+from bitboard import Position
+from engine import AIPlayer, Connect4
+from opening_book import OpeningBook, load_book, write_book
+
+
+def random_games(count: int, seed: int = 0):
+    """(game, mirror image) pairs of unfinished random games."""
+    rng = random.Random(seed)
+    while count:
+        game, mirror = Connect4(), Connect4()
+        for _ in range(rng.randint(0, 14)):
+            col = rng.choice(game.get_valid_moves())
+            game.drop_piece(col)
+            mirror.drop_piece(game.cols - 1 - col)
+        if not game.game_over:
+            count -= 1
+            yield game, mirror
+
+
+def test_mirrored_positions_get_mirrored_scores_and_moves():
+    for game, mirror in random_games(10):
+        stats = AIPlayer(game.current_player, "hard", depth=4).search(game)
+        mirror_stats = AIPlayer(game.current_player, "hard", depth=4).search(mirror)
+        expected = {game.cols - 1 - col: score for col, score in stats.root_scores.items()}
+        assert mirror_stats.root_scores == expected
+        best = max(stats.root_scores.values())
+        if list(stats.root_scores.values()).count(best) == 1:
+            assert mirror_stats.move == game.cols - 1 - stats.move
+
+
+def test_mirror_reuses_the_original_search():
+    for game, mirror in random_games(5, seed=1):
+        expected = {game.cols - 1 - col: score
+                    for col, score in AIPlayer(game.current_player, "hard", depth=4).search(game).root_scores.items()}
+        for symmetry in (True, False):
+            ai = AIPlayer(game.current_player, "hard", depth=4, symmetry=symmetry)
+            ai.search(game)
+            assert ai.search(mirror).root_scores == expected
+
+
+def test_book_answers_the_mirror_with_the_mirrored_move(tmp_path):
+    position, mirror = Position(), Position()
+    for col in (0, 1, 1):
+        position.play(col)
+        mirror.play(position.cols - 1 - col)
+    key, mirrored = position.canonical_key()
+    path = str(tmp_path / "book.bin")
+    write_book(path, {key: (position.cols - 1 - 2 if mirrored else 2, 5)})
+    book = OpeningBook(path)
+    try:
+        assert book.lookup(position) == (2, 5)
+        assert book.lookup(mirror) == (position.cols - 1 - 2, 5)
+    finally:
+        book.close()
+
+
+def test_load_book_skips_a_stale_file_with_a_warning(tmp_path):
+    path = tmp_path / "book.bin"
+    path.write_bytes(b"C4BK\x01\x00")
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        assert load_book(str(path)) is None
+    assert "playing without it" in str(caught[0].message)
+    assert load_book(str(tmp_path / "missing.bin")) is None
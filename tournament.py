@@ -0,0 +1,162 @@
+"""Headless AI vs AI matches, spread across a process pool.
+
+Plays N games between two AIPlayer configurations without Tkinter,
+alternating who moves first, streams one JSON line per finished game and
+ends with win/draw rates and 95% confidence intervals.
+
+    python tournament.py --games 200 --player-a hard:depth=5 --player-b medium
+    python tournament.py -n 50 -a hard:time_budget_ms=100 -b hard:depth=4 -o games.jsonl
+
+A player is ``difficulty[:key=value,...]``; keys are AIPlayer arguments
+(depth, tt_size, book, endgame, evaluator, playouts, exploration,
+threat_pruning, symmetry, ...) plus time_budget_ms, which is passed to
+get_move; true and false set flags.
+
+    python tournament.py -n 100 -a mcts:time_budget_ms=50 -b hard:time_budget_ms=50
+"""
+
+import argparse
+import inspect
+import json
+import math
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Optional, Set, Tuple
+
+from engine import AIPlayer, Connect4
+
+
+def player_options() -> Set[str]:
+    """Keys a player spec may set: AIPlayer's arguments that take a single
+    value, plus time_budget_ms."""
+    names = set(inspect.signature(AIPlayer).parameters) - {"player_num", "difficulty", "ordering", "hooks"}
+    return names | {"time_budget_ms"}
+
+
+def parse_player(spec: str) -> Dict:
+    """Turn ``hard:depth=5,book=opening_book.bin`` into a config dict.
+
+    Values are read as true/false (any case), int, float or str; an
+    unknown key raises ValueError."""
+    difficulty, _, options = spec.partition(":")
+    config = {"difficulty": difficulty}
+    allowed = player_options()
+    for option in filter(None, options.split(",")):
+        key, _, value = option.partition("=")
+        key = key.strip()
+        if key not in allowed:
+            raise ValueError(f"unknown player option {key!r} in {spec!r}")
+        if value.lower() in ("true", "false"):
+            config[key] = value.lower() == "true"
+            continue
+        for kind in (int, float, str):
+            try:
+                config[key] = kind(value)
+                break
+            except ValueError:
+                pass
+    return config
+
+
+def make_player(config: Dict, player_num: int) -> Tuple[AIPlayer, Optional[int]]:
+    """Build an AIPlayer from a config; returns it with its time budget."""
+    options = dict(config)
+    time_budget_ms = options.pop("time_budget_ms", None)
+    return AIPlayer(player_num, **options), time_budget_ms
+
+
+def play_game(index: int, config_a: Dict, config_b: Dict, a_first: bool, seed: int,
+              rows: int = 6, cols: int = 7) -> Dict:
+    """Play one game and return its record."""
+    random.seed(seed)
+    first, second = (config_a, config_b) if a_first else (config_b, config_a)
+    players = {1: make_player(first, 1), 2: make_player(second, 2)}
+    names = {1: "A" if a_first else "B", 2: "B" if a_first else "A"}
+
+    game = Connect4(rows, cols)
+    moves, latency_ms, nodes = [], [], []
+    while not game.game_over:
+        ai, time_budget_ms = players[game.current_player]
+        stats = ai.search(game, time_budget_ms)
+        latency_ms.append(round(stats.elapsed * 1000, 3))
+        nodes.append(stats.nodes)
+        moves.append(stats.move)
+        game.drop_piece(stats.move)
+
+    return {
+        "game": index,
+        "first": names[1],
+        "winner": names[game.winner] if game.winner else None,
+        "moves": moves,
+        "latency_ms": latency_ms,
+        "nodes": nodes,
+    }
+
+
+def wilson_interval(successes: int, trials: int, z: float = 1.96) -> Tuple[float, float]:
+    """95% Wilson score interval for a proportion."""
+    if trials == 0:
+        return 0.0, 0.0
+    p = successes / trials
+    denominator = 1 + z * z / trials
+    center = (p + z * z / (2 * trials)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials)) / denominator
+    return max(0.0, center - margin), min(1.0, center + margin)
+
+
+def run_tournament(config_a: Dict, config_b: Dict, games: int, workers: Optional[int] = None,
+                   seed: int = 0, output=None, rows: int = 6, cols: int = 7) -> Dict[str, int]:
+    """Play ``games`` games and write one JSON line per game to ``output``.
+
+    Returns the tally of "A", "B" and "draw" results.
+    """
+    tally = {"A": 0, "B": 0, "draw": 0}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(play_game, i, config_a, config_b, i % 2 == 0, seed + i, rows, cols)
+                   for i in range(games)]
+        for future in as_completed(futures):
+            record = future.result()
+            tally[record["winner"] or "draw"] += 1
+            if output is not None:
+                output.write(json.dumps(record) + "\n")
+                output.flush()
+    return tally
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play AI vs AI games without the GUI.")
+    parser.add_argument("-a", "--player-a", default="hard", help="first AI config, e.g. hard:depth=5")
+    parser.add_argument("-b", "--player-b", default="medium", help="second AI config")
+    parser.add_argument("-n", "--games", type=int, default=100)
+    parser.add_argument("-w", "--workers", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("-o", "--output", default="-", help="JSONL file for game records ('-' for stdout)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--rows", type=int, default=6)
+    parser.add_argument("--cols", type=int, default=7)
+    args = parser.parse_args(argv)
+
+    try:
+        config_a, config_b = parse_player(args.player_a), parse_player(args.player_b)
+    except ValueError as e:
+        parser.error(str(e))
+    output = sys.stdout if args.output == "-" else open(args.output, "w")
+    start = time.perf_counter()
+    try:
+        tally = run_tournament(config_a, config_b, args.games, args.workers, args.seed, output,
+                               args.rows, args.cols)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    elapsed = time.perf_counter() - start
+
+    print(f"\n{args.games} games in {elapsed:.1f}s: A = {args.player_a}, B = {args.player_b}", file=sys.stderr)
+    for name, label in (("A", "A wins"), ("B", "B wins"), ("draw", "Draws ")):
+        low, high = wilson_interval(tally[name], args.games)
+        rate = tally[name] / args.games if args.games else 0.0
+        print(f"{label}: {tally[name]:5d}  {rate:6.1%}  (95% CI {low:.1%} - {high:.1%})", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
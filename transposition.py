@@ -0,0 +1,139 @@
+"""Transposition table for the minimax search.
+
+The table has a fixed number of buckets, each with two slots: a
+depth-preferred slot that keeps the deepest result seen for the bucket and
+an always-replace slot for everything else.  Memory therefore stays bounded
+no matter how long the table lives, so an AIPlayer can keep one for a whole
+game and reuse earlier searches on later moves.
+
+AIPlayer keys the table on Position.canonical_key(), so a position and its
+mirror image share an entry.  Run ``python transposition.py [depth]`` to
+check that mirrored positions get mirrored scores and moves, and to compare
+table use with and without the mirror folding.
+"""
+
+import random
+import sys
+from typing import Optional, Tuple
+
+EXACT = 0
+LOWER = 1  # value is a lower bound (search failed high)
+UPPER = 2  # value is an upper bound (search failed low)
+
+
+def _next_prime(n: int) -> int:
+    def is_prime(k: int) -> bool:
+        if k < 2:
+            return False
+        i = 2
+        while i * i <= k:
+            if k % i == 0:
+                return False
+            i += 1
+        return True
+
+    while not is_prime(n):
+        n += 1
+    return n
+
+
+class TranspositionTable:
+    """Bounded position-key -> (value, depth, bound, best move) cache."""
+
+    def __init__(self, max_entries: int = 1 << 18):
+        # A prime bucket count spreads the bitboard keys, whose low bits
+        # only describe the first column, across the whole table
+        self.buckets = _next_prime(max(1, max_entries // 2))
+        self.keys = [None] * (2 * self.buckets)
+        self.entries = [None] * (2 * self.buckets)
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+        self.stores = 0
+
+    def clear(self):
+        self.keys = [None] * (2 * self.buckets)
+        self.entries = [None] * (2 * self.buckets)
+        self.reset_stats()
+
+    def probe(self, key: int) -> Optional[Tuple[float, int, int, Optional[int]]]:
+        """Return (value, depth, bound, best_move) for a key, or None."""
+        slot = 2 * (key % self.buckets)
+        keys = self.keys
+        if keys[slot] == key:
+            self.hits += 1
+            return self.entries[slot]
+        if keys[slot + 1] == key:
+            self.hits += 1
+            return self.entries[slot + 1]
+        self.misses += 1
+        if keys[slot] is not None or keys[slot + 1] is not None:
+            self.collisions += 1
+        return None
+
+    def store(self, key: int, value: float, depth: int, bound: int, best_move: Optional[int]):
+        slot = 2 * (key % self.buckets)
+        self.stores += 1
+        entry = (value, depth, bound, best_move)
+        current = self.entries[slot]
+        if current is None or self.keys[slot] == key or depth >= current[1]:
+            self.keys[slot] = key
+            self.entries[slot] = entry
+        else:
+            self.keys[slot + 1] = key
+            self.entries[slot + 1] = entry
+
+    def __len__(self) -> int:
+        return sum(1 for key in self.keys if key is not None)
+
+    def hit_rate(self) -> float:
+        probes = self.hits + self.misses
+        return self.hits / probes if probes else 0.0
+
+
+if __name__ == "__main__":
+    from engine import AIPlayer, Connect4
+
+    depth = int(sys.argv[1]) if len(sys.argv) > 1 else 6
+    rng = random.Random(0)
+    checked = 0
+    totals = {True: [0, 0, 0], False: [0, 0, 0]}  # symmetry -> nodes, hits, probes
+    while checked < 40:
+        moves = []
+        game = Connect4()
+        for _ in range(rng.randint(0, 14)):
+            moves.append(rng.choice(game.get_valid_moves()))
+            game.drop_piece(moves[-1])
+        if game.game_over:
+            continue
+        mirror = Connect4()
+        for col in moves:
+            mirror.drop_piece(game.cols - 1 - col)
+
+        # Each orientation searched by a fresh player, then both by one
+        # player that can reuse the first search for the second
+        stats = AIPlayer(game.current_player, "hard", depth=depth).search(game)
+        mirror_stats = AIPlayer(game.current_player, "hard", depth=depth).search(mirror)
+        expected = {game.cols - 1 - col: score for col, score in stats.root_scores.items()}
+        assert mirror_stats.root_scores == expected, (moves, stats.root_scores, mirror_stats.root_scores)
+        best = max(stats.root_scores.values())
+        if list(stats.root_scores.values()).count(best) == 1:
+            assert mirror_stats.move == game.cols - 1 - stats.move, (moves, stats.move, mirror_stats.move)
+        for symmetry in (True, False):
+            ai = AIPlayer(game.current_player, "hard", depth=depth, symmetry=symmetry)
+            ai.search(game)
+            second = ai.search(mirror)
+            assert second.root_scores == expected, (moves, symmetry)
+            total = totals[symmetry]
+            total[0] += second.nodes
+            total[1] += second.tt_hits
+            total[2] += second.tt_hits + second.tt_misses
+        checked += 1
+
+    print(f"{checked} positions: mirrored positions get mirrored scores and moves")
+    for symmetry, (nodes, hits, probes) in totals.items():
+        print(f"symmetry {'on ' if symmetry else 'off'}: mirror searched after original in "
+              f"{nodes:7d} nodes, TT hit rate {hits / probes:.1%}")